@@ -2,4 +2,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Read by settings: no persistent database connections under ASGI
+os.environ.setdefault('DJANGO_ASGI', '1')
 application = get_asgi_application()
@@ -0,0 +1,67 @@
+# core/compression.py
+"""
+Per-response content negotiation for compressed API payloads.
+
+Used on selected API responses (rather than a global GZipMiddleware) so that
+HTML pages carrying CSRF tokens are never compressed. Brotli is used when the
+optional `brotli` package is installed and the client accepts it, gzip
+otherwise.
+"""
+
+import re
+
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_LENGTH = 200
+
+_br_re = re.compile(r"\bbr\b")
+_gzip_re = re.compile(r"\bgzip\b")
+
+
+def choose_encoding(request):
+    """Return the best content coding accepted by the client, or None."""
+    accept = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if brotli is not None and _br_re.search(accept):
+        return "br"
+    if _gzip_re.search(accept):
+        return "gzip"
+    return None
+
+
+def compress_response(request, response):
+    """Compress a rendered response in place when worthwhile."""
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if (
+        response.streaming
+        or response.status_code != 200
+        or response.has_header("Content-Encoding")
+        or len(response.content) < MIN_COMPRESS_LENGTH
+    ):
+        return response
+
+    encoding = choose_encoding(request)
+    if encoding == "br":
+        content = brotli.compress(response.content)
+    elif encoding == "gzip":
+        content = compress_string(response.content)
+    else:
+        return response
+
+    if len(content) >= len(response.content):
+        return response
+    response.content = content
+    response["Content-Length"] = str(len(content))
+    response["Content-Encoding"] = encoding
+    return response
+
+
+def compress_on_render(request, response):
+    """Compress a DRF/template response once it has been rendered."""
+    response.add_post_render_callback(lambda r: compress_response(request, r))
+    return response
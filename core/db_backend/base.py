@@ -0,0 +1,104 @@
+# core/db_backend/base.py
+"""
+django-tenants PostgreSQL backend with per-tenant resource limits.
+
+Alongside the tenant search_path, each connection gets statement_timeout,
+lock_timeout and work_mem resolved from settings.TENANT_DB_LIMITS for the
+current request class ("api", "admin", "web" or "batch"), overridden by the
+tenant's Client.db_resource_limits.
+"""
+
+import logging
+
+from django.conf import settings
+from django_tenants.postgresql_backend.base import (
+    DatabaseWrapper as TenantDatabaseWrapper,
+    psycopg,
+)
+import django.db.utils
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_LIMIT_SETTINGS = ("statement_timeout", "lock_timeout", "work_mem")
+DEFAULT_REQUEST_CLASS = "batch"
+
+
+def get_resource_limits(tenant, request_class):
+    """Merge the configured limits for a tenant and request class."""
+    configured = getattr(settings, "TENANT_DB_LIMITS", {})
+    overrides = getattr(tenant, "db_resource_limits", None) or {}
+
+    limits = {}
+    for source in (
+        configured.get("default", {}),
+        configured.get(request_class, {}),
+        overrides.get("default", {}),
+        overrides.get(request_class, {}),
+    ):
+        limits.update(
+            (name, str(value))
+            for name, value in source.items()
+            if name in RESOURCE_LIMIT_SETTINGS
+        )
+    return limits
+
+
+class DatabaseWrapper(TenantDatabaseWrapper):
+    """Applies the tenant resource limits whenever the search_path is set."""
+
+    def __init__(self, *args, **kwargs):
+        self.request_class = DEFAULT_REQUEST_CLASS
+        self.resource_limits_set = None
+        super().__init__(*args, **kwargs)
+
+    def close(self):
+        self.resource_limits_set = None
+        super().close()
+
+    def rollback(self):
+        self.resource_limits_set = None
+        super().rollback()
+
+    def savepoint_rollback(self, sid):
+        try:
+            super().savepoint_rollback(sid)
+        finally:
+            self.resource_limits_set = None
+
+    def set_request_class(self, request_class):
+        """Select which class of limits applies to subsequent queries."""
+        self.request_class = request_class
+
+    def _handle_search_path(self, cursor=None):
+        if self._setting_search_path:
+            return
+        super()._handle_search_path(cursor)
+        self._handle_resource_limits(cursor)
+
+    def _handle_resource_limits(self, cursor=None):
+        # Session settings survive tenant switches: only changed limits are
+        # sent, so routing the same tenant on every request costs nothing
+        limits = get_resource_limits(self.tenant, self.request_class)
+        if not limits or limits == self.resource_limits_set:
+            return
+
+        self._setting_search_path = True
+        cursor_for_limits = self.connection.cursor() if cursor is None else cursor
+        names = list(limits)
+        try:
+            cursor_for_limits.execute(
+                "SELECT "
+                + ", ".join("set_config(%s, %s, false)" for _ in names),
+                [part for name in names for part in (name, limits[name])],
+            )
+        except (django.db.utils.DatabaseError, psycopg.Error) as e:
+            logger.warning(
+                f"Could not apply resource limits for {self.schema_name}: {e}"
+            )
+            self.resource_limits_set = None
+        else:
+            self.resource_limits_set = limits
+        finally:
+            self._setting_search_path = False
+            if cursor is None:
+                cursor_for_limits.close()
@@ -0,0 +1,122 @@
+# core/export.py
+"""
+Streaming data exports (CSV, NDJSON, GeoJSONSeq).
+
+Records are produced lazily (typically from `.values().iterator()` on a
+server-side cursor) and encoded in batches of lines, so memory use does not
+depend on the size of the export.
+
+Under ASGI, Django reads a sync iterator in one `sync_to_async(list)` call,
+buffering the whole body before the first byte is sent. `streaming_response`
+hands ASGI servers an async iterator instead, which advances the sync one
+chunk by chunk in the request's thread (where its server-side cursor lives).
+"""
+
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "geojsonseq": "application/geo+json-seq",
+}
+EXPORT_EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "geojsonseq": "geojsons"}
+# RFC 8142 record separator for GeoJSON text sequences
+RECORD_SEPARATOR = "\x1e"
+
+
+def get_export_chunk_size():
+    return getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+
+class _Echo:
+    """File-like object returning what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(records, fields, chunk_size=None):
+    """Yield CSV bytes for dict records, header first."""
+    chunk_size = chunk_size or get_export_chunk_size()
+    writer = csv.writer(_Echo())
+    buffer = [writer.writerow(fields)]
+    for record in records:
+        buffer.append(writer.writerow([record.get(field) for field in fields]))
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer = []
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def json_lines_chunks(records, chunk_size=None, prefix=""):
+    """Yield one JSON document per line, optionally prefixed (GeoJSONSeq)."""
+    chunk_size = chunk_size or get_export_chunk_size()
+    buffer = []
+    for record in records:
+        buffer.append(
+            prefix
+            + json.dumps(record, cls=DjangoJSONEncoder, separators=(",", ":"))
+            + "\n"
+        )
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer = []
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def is_asgi_request(request):
+    """True for Django (or DRF-wrapped) requests served by an ASGI server."""
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+async def iterate_in_thread(chunks):
+    """
+    Async iterator over a sync iterator of chunks. Each chunk is produced in
+    the request's thread-sensitive executor thread, so database cursors
+    opened by the iterator stay on their connection; the iterator is closed
+    there too when the client goes away.
+    """
+    iterator = iter(chunks)
+    done = object()
+    produce = sync_to_async(next)
+    try:
+        while True:
+            chunk = await produce(iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def streaming_response(request, chunks, content_type):
+    """
+    StreamingHttpResponse over sync `chunks` that is streamed chunk by chunk
+    under both WSGI and ASGI.
+    """
+    if is_asgi_request(request):
+        chunks = iterate_in_thread(chunks)
+    return StreamingHttpResponse(chunks, content_type=content_type)
+
+
+def export_response(request, chunks, export_format, basename):
+    """Wrap encoded chunks in a streaming attachment response."""
+    filename = (
+        f"{basename}-{timezone.now():%Y%m%d-%H%M%S}.{EXPORT_EXTENSIONS[export_format]}"
+    )
+    response = streaming_response(request, chunks, EXPORT_CONTENT_TYPES[export_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["Cache-Control"] = "no-store"
+    return response
@@ -1,13 +1,17 @@
 # core/middleware.py
 
 from django.contrib import admin
-from django.http import HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseForbidden
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connection
+from django.dispatch import receiver
+from django_tenants.middleware.main import TenantMainMiddleware
 from django_tenants.utils import get_public_schema_name
 from django.shortcuts import redirect
 from django.utils import translation
-from core.tenant_utils import get_current_tenant
+from core.tenant_utils import get_current_tenant, get_cached_tenant
 import re
 import logging
 
@@ -21,6 +25,104 @@ from .constants import (
 )
 
 
+class TenantRoutingMiddleware(TenantMainMiddleware):
+    """
+    Tenant resolution backed by the cache, refusing inactive tenants.
+
+    Suspended tenants get a static response before the schema is activated,
+    so no tenant query, template rendering or session access happens.
+    """
+
+    def get_tenant(self, domain_model, hostname):
+        return get_cached_tenant(domain_model, hostname)
+
+    def process_request(self, request):
+        response = super().process_request(request)
+        if response is not None:
+            return response
+
+        tenant = getattr(request, "tenant", None)
+        if (
+            tenant is not None
+            and tenant.schema_name != get_public_schema_name()
+            and not tenant.is_active
+        ):
+            connection.set_schema_to_public()
+            return self.inactive_tenant_response(request, tenant)
+        return None
+
+    def inactive_tenant_response(self, request, tenant):
+        status = getattr(settings, "TENANT_INACTIVE_STATUS", 503)
+        response = HttpResponse(
+            "This service is currently unavailable.",
+            status=status,
+            content_type="text/plain; charset=utf-8",
+        )
+        if status == 503:
+            response["Retry-After"] = str(
+                getattr(settings, "TENANT_INACTIVE_RETRY_AFTER", 3600)
+            )
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class DatabaseRequestClassMiddleware:
+    """
+    Select the database resource limits class (api, admin or web) for the
+    request, falling back to batch limits once the response is closed.
+
+    Installed before tenant routing so the domain lookup runs under the
+    request's limits. Streaming responses run their queries while the body
+    is sent, after the view returned: the class is kept until the server
+    closes the response and `request_finished` resets it (on the same
+    thread, under WSGI and ASGI).
+    """
+
+    admin_pattern = re.compile(r'^(/[a-z]{2})?/admin/')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        set_request_class = getattr(connection, "set_request_class", None)
+        if set_request_class is None:
+            return self.get_response(request)
+
+        set_request_class(self.get_request_class(request))
+        return self.get_response(request)
+
+    def get_request_class(self, request):
+        if self.admin_pattern.match(request.path):
+            return "admin"
+        if "/api/" in request.path:
+            return "api"
+        return "web"
+
+
+@receiver(request_finished, dispatch_uid="core.middleware.reset_request_class")
+def reset_request_class(sender, **kwargs):
+    """Fall back to batch limits once the response has been sent and closed."""
+    set_request_class = getattr(connection, "set_request_class", None)
+    if set_request_class is not None:
+        set_request_class("batch")
+
+
+class RateLimitHeadersMiddleware:
+    """Expose the tenant API throttle state as X-RateLimit-* response headers."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit:
+            response["X-RateLimit-Limit"] = str(rate_limit["limit"])
+            response["X-RateLimit-Remaining"] = str(max(0, rate_limit["remaining"]))
+            response["X-RateLimit-Scope"] = rate_limit["scope"]
+        return response
+
+
 class TenantTypeMiddleware(MiddlewareMixin):
     """Middleware to verify tenant type and prevent wrong admin access."""
 
@@ -0,0 +1,147 @@
+# core/pagination.py
+"""
+Keyset (cursor) pagination for tenant APIs and list views.
+
+Pages are selected with `WHERE key > last_seen ORDER BY key LIMIT n` on an
+indexed ordering instead of COUNT(*) + OFFSET, so each page costs the same
+however deep a client walks. The maximum page size is configurable per
+tenant (Client.api_max_page_size), falling back to settings.API_MAX_PAGE_SIZE.
+"""
+
+import base64
+import binascii
+import contextlib
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+from django.utils.translation import gettext as _
+from rest_framework.pagination import CursorPagination, _positive_int
+
+from core.tenant_utils import get_current_tenant
+
+
+def get_max_page_size(request=None):
+    """Largest page size a client of the current tenant may request."""
+    tenant = getattr(request, "tenant", None) or get_current_tenant()
+    max_page_size = getattr(tenant, "api_max_page_size", None)
+    return max_page_size or getattr(settings, "API_MAX_PAGE_SIZE", 500)
+
+
+def get_requested_page_size(request, default, param="page_size"):
+    """Page size from the query string, capped by the tenant maximum."""
+    with contextlib.suppress(KeyError, ValueError):
+        return _positive_int(
+            request.GET[param], strict=True, cutoff=get_max_page_size(request)
+        )
+    return default
+
+
+def get_annotated_ordering(queryset, default):
+    """
+    Ordering of a queryset annotated by a radius search (`distance`) or a
+    text search (`search_rank`), else `default`.
+    """
+    if "distance" in queryset.query.annotations:
+        return ("distance", "id")
+    if "search_rank" in queryset.query.annotations:
+        return ("-search_rank", "id")
+    return default
+
+
+class TenantCursorPagination(CursorPagination):
+    """
+    Cursor pagination with a `page_size` parameter capped per tenant.
+    Views set `ordering`, whose first field should be indexed. When the
+    queryset carries a `distance` annotation (radius searches) or a
+    `search_rank` (text search), pages follow that ordering instead.
+    """
+
+    ordering = ("-created_at", "id")
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, request):
+        return get_requested_page_size(
+            request, self.page_size, self.page_size_query_param
+        )
+
+    def get_ordering(self, request, queryset, view):
+        return get_annotated_ordering(
+            queryset, getattr(view, "ordering", None) or self.ordering
+        )
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """Keeps the microseconds that DjangoJSONEncoder drops from datetimes."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPaginationMixin:
+    """
+    Keyset pagination for Django ListViews.
+    Orders by `keyset_ordering` (a field and the primary key, both descending
+    or both ascending) and selects the page after the `?after=` cursor.
+    Adds `next_cursor` to the context.
+    """
+
+    keyset_ordering = ("-pk",)
+    paginate_by = 25
+    cursor_param = "after"
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, f.lstrip("-")) for f in self.keyset_ordering]
+        cursor = json.dumps(values, cls=CursorJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def decode_cursor(self):
+        """Keyset values of the `?after=` cursor; None on the first page."""
+        cursor = self.request.GET.get(self.cursor_param)
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError):
+            raise Http404(_("Invalid cursor."))
+        if not isinstance(values, list) or len(values) != len(self.keyset_ordering):
+            raise Http404(_("Invalid cursor."))
+        return values
+
+    def get_keyset_filter(self, values):
+        """Q selecting rows strictly after `values` in keyset order."""
+        fields = [field.lstrip("-") for field in self.keyset_ordering]
+        condition = Q()
+        for i, field in enumerate(self.keyset_ordering):
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = dict(zip(fields[:i], values[:i]))
+            condition |= Q(**equal, **{f"{fields[i]}__{lookup}": values[i]})
+        return condition
+
+    def get_paginate_by(self, queryset):
+        return get_requested_page_size(self.request, self.paginate_by)
+
+    def paginate_queryset(self, queryset, page_size):
+        queryset = queryset.order_by(*self.keyset_ordering)
+        values = self.decode_cursor()
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(values))
+            except ValidationError:
+                raise Http404(_("Invalid cursor."))
+        rows = list(queryset[: page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if len(rows) > page_size else None
+        is_paginated = self.next_cursor is not None or values is not None
+        return None, None, page, is_paginated
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["next_cursor"] = getattr(self, "next_cursor", None)
+        return context
@@ -140,6 +140,12 @@ for schema in TENANT_TYPES:
     ]
 
 PUBLIC_SCHEMA_NAME = 'public'
+
+# Resolved tenants are cached per hostname; inactive tenants get a static
+# response (503 with Retry-After, or 410 for permanently closed tenants).
+TENANT_CACHE_TIMEOUT = int(os.environ.get('TENANT_CACHE_TIMEOUT', '300'))
+TENANT_INACTIVE_STATUS = int(os.environ.get('TENANT_INACTIVE_STATUS', '503'))
+TENANT_INACTIVE_RETRY_AFTER = 3600
 PG_EXTRA_SEARCH_PATHS = ["extensions"]
 ORIGINAL_BACKEND = "django.contrib.gis.db.backends.postgis"
 
@@ -161,7 +167,8 @@ SPECTACULAR_SETTINGS = {
 }
 
 MIDDLEWARE = [
-    "django_tenants.middleware.main.TenantMainMiddleware",
+    "core.middleware.DatabaseRequestClassMiddleware",
+    "core.middleware.TenantRoutingMiddleware",
     "core.middleware.JazzminSettingsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -177,6 +184,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "core.middleware.TenantTypeMiddleware",
+    "core.middleware.RateLimitHeadersMiddleware",
     "csp.middleware.CSPMiddleware",
 ]
 
@@ -275,6 +283,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 
 # ==========================================
 # DATABASE
@@ -291,21 +300,29 @@ if _database_url:
     if _database_url.startswith("postgres://"):
         _database_url = _database_url.replace("postgres://", "postgresql://", 1)
 
+# Under ASGI, sync views and sync_to_async calls run in thread-pool threads
+# that each keep their own connection past the end of the request, so
+# persistent connections would exhaust the Postgres connection limit.
+# core/asgi.py sets DJANGO_ASGI; DB_CONN_MAX_AGE overrides either default.
+_conn_max_age = int(
+    os.environ.get("DB_CONN_MAX_AGE", "0" if os.environ.get("DJANGO_ASGI") else "600")
+)
+
 if _database_url and _database_url.startswith("postgresql://"):
     import dj_database_url
     DATABASES = {
         "default": dj_database_url.config(
             default=_database_url,
-            conn_max_age=600,
+            conn_max_age=_conn_max_age,
             conn_health_checks=True,
             ssl_require=True,
         )
     }
-    DATABASES["default"]["ENGINE"] = "django_tenants.postgresql_backend"
+    DATABASES["default"]["ENGINE"] = "core.db_backend"
 else:
     DATABASES = {
         "default": {
-            "ENGINE": "django_tenants.postgresql_backend",
+            "ENGINE": "core.db_backend",
             "NAME": os.environ.get("POSTGRES_DB", "starter_db"),
             "USER": os.environ.get("POSTGRES_USER", "starter_user"),
             "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "change_me"),
@@ -316,6 +333,15 @@ else:
 
 DATABASE_ROUTERS = ["django_tenants.routers.TenantSyncRouter"]
 
+# Per-connection guardrails applied with the tenant search_path, by request
+# class. Client.db_resource_limits can override any of them per tenant.
+TENANT_DB_LIMITS = {
+    "default": {"statement_timeout": "10s", "lock_timeout": "3s", "work_mem": "8MB"},
+    "api": {"statement_timeout": "5s"},
+    "admin": {"statement_timeout": "30s", "work_mem": "16MB"},
+    "batch": {"statement_timeout": "0", "lock_timeout": "30s", "work_mem": "64MB"},
+}
+
 # ==========================================
 # AUTH
 # ==========================================
@@ -450,6 +476,26 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
+    # User before tenant: requests denied per user are not charged to the tenant
+    "DEFAULT_THROTTLE_CLASSES": [
+        "core.throttling.TenantUserRateThrottle",
+        "core.throttling.TenantRateThrottle",
+    ],
+}
+
+# Largest page size API clients may request, overridable per Client
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', '500'))
+
+# Rows fetched per server-side cursor round trip in streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Default per-minute API limits, overridable per Client
+TENANT_THROTTLE = {
+    "TENANT_RATE": int(os.environ.get('TENANT_API_RATE_LIMIT', '1200')),
+    "USER_RATE": int(os.environ.get('TENANT_API_USER_RATE_LIMIT', '300')),
+    # Per user, for map tiles and clusters (dozens per pan or zoom)
+    "TILE_RATE": int(os.environ.get('TENANT_API_TILE_RATE_LIMIT', '6000')),
+    "CACHE_ALIAS": "default",
 }
 
 # ==========================================
@@ -505,6 +551,78 @@ else:
     SESSION_ENGINE = "django.contrib.sessions.backends.db"
 SESSION_COOKIE_AGE = 86400
 
+# ==========================================
+# GEOMAP
+# ==========================================
+
+# Generated map tiles (vector tiles, cluster tiles). Point
+# GEOMAP_TILE_CACHE_DIR at a directory to keep tiles on local disk instead of
+# the default cache. "version" invalidation drops all tiles of a tenant on any
+# location change, "precise" only those covering the changed positions.
+# Data version counters must stay in a cache shared by all nodes.
+GEOMAP_TILE_CACHE_ALIAS = "default"
+GEOMAP_VERSION_CACHE_ALIAS = "default"
+GEOMAP_TILE_CACHE_TIMEOUT = 86400
+GEOMAP_TILE_INVALIDATION = os.environ.get('GEOMAP_TILE_INVALIDATION', 'version')
+
+# Rows fetched per server-side cursor round trip when streaming GeoJSON
+GEOMAP_STREAM_CHUNK_SIZE = 2000
+
+# Rows per validation batch and transaction in bulk location upserts
+GEOMAP_BULK_CHUNK_SIZE = 1000
+
+# Location file imports: rows per COPY/merge batch, and the gazetteer used
+# to geocode rows without coordinates (CSV of zip_code,city,longitude,latitude)
+GEOMAP_IMPORT_BATCH_SIZE = 5000
+GEOMAP_GAZETTEER = "tenant_apps.geomap.gazetteer.CSVGazetteer"
+GEOMAP_GAZETTEER_FILE = os.environ.get('GEOMAP_GAZETTEER_FILE', '')
+# Admin uploads are queued and run by `manage.py run_location_imports`;
+# jobs still running after this many seconds are marked failed (their
+# runner was killed)
+GEOMAP_IMPORT_TIMEOUT = 6 * 3600
+
+# Cache-Control of the conditional read APIs (ETag / Last-Modified), by
+# router basename. "no-cache" makes browsers revalidate on every map load,
+# which costs a 304 without body or database query when nothing changed.
+GEOMAP_CACHE_CONTROL = {
+    "locationtype": "private, no-cache",
+    "maplayer": "private, no-cache",
+}
+# Seconds the cached table state behind those validators is trusted; writes
+# through the ORM refresh it right away
+GEOMAP_TABLE_STATE_TIMEOUT = 60
+
+# Rendered geomap API responses, shared by the users of a tenant and
+# invalidated by per-model version counters
+GEOMAP_RESPONSE_CACHE_ALIAS = "default"
+GEOMAP_RESPONSE_CACHE_TIMEOUT = 300
+
+# Location change feed: deletions are remembered this long (purged by
+# `manage.py purge_location_tombstones`), and transactions running longer
+# than this many seconds stop holding the feed of every tenant back
+GEOMAP_TOMBSTONE_RETENTION_DAYS = 30
+GEOMAP_CHANGES_MAX_LAG_SECONDS = 300
+
+# Live map updates: location changes are published to Redis pub/sub and
+# streamed to open maps as server-sent events (requires an ASGI server)
+GEOMAP_EVENTS_REDIS_URL = os.environ.get('GEOMAP_EVENTS_REDIS_URL', '') or (
+    CACHES["default"]["LOCATION"] if _redis_url or _redis_host else ""
+)
+GEOMAP_EVENTS_HEARTBEAT = 15
+# Open event streams per ASGI worker process, in total and per user
+GEOMAP_EVENTS_MAX_STREAMS = 1000
+GEOMAP_EVENTS_MAX_STREAMS_PER_USER = 5
+
+_tile_cache_dir = os.environ.get('GEOMAP_TILE_CACHE_DIR', '')
+if _tile_cache_dir:
+    CACHES["tiles"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": _tile_cache_dir,
+        "TIMEOUT": GEOMAP_TILE_CACHE_TIMEOUT,
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    }
+    GEOMAP_TILE_CACHE_ALIAS = "tiles"
+
 # ==========================================
 # LOGGING
 # ==========================================
@@ -0,0 +1,20 @@
+# core/settings_benchmark.py
+"""
+Settings of the servers started by `manage.py benchmark_asgi`.
+
+The benchmark fires hundreds of requests per second with one token, so API
+throttling would answer most of them with 429 and the response cache would
+serve the rest without reaching the view. Both are disabled to measure the
+workers themselves.
+"""
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import CACHES, REST_FRAMEWORK
+
+REST_FRAMEWORK = {**REST_FRAMEWORK, "DEFAULT_THROTTLE_CLASSES": []}
+
+CACHES = {
+    **CACHES,
+    "benchmark_no_cache": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+GEOMAP_RESPONSE_CACHE_ALIAS = "benchmark_no_cache"
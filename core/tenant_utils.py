@@ -1,4 +1,6 @@
 # core/tenant_utils.py - Utilities for tenant management
+from django.conf import settings
+from django.core.cache import cache
 from django.db import connection
 import logging
 
@@ -114,3 +116,38 @@ class TenantContextManager:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         pass
+
+
+# ==========================================
+# CACHED TENANT RESOLUTION
+# ==========================================
+
+TENANT_CACHE_KEY_PREFIX = "tenant:domain"
+
+
+def get_tenant_cache_key(hostname):
+    """Cache key holding the tenant resolved for a hostname."""
+    return f"{TENANT_CACHE_KEY_PREFIX}:{hostname}"
+
+
+def get_cached_tenant(domain_model, hostname):
+    """
+    Resolve the tenant for a hostname, using the cache when possible.
+    Raises domain_model.DoesNotExist like the django-tenants lookup.
+    """
+    key = get_tenant_cache_key(hostname)
+    tenant = cache.get(key)
+    if tenant is not None:
+        return tenant
+
+    domain = domain_model.objects.select_related("tenant").get(domain=hostname)
+    tenant = domain.tenant
+    cache.set(key, tenant, getattr(settings, "TENANT_CACHE_TIMEOUT", 300))
+    return tenant
+
+
+def invalidate_tenant_cache(*hostnames):
+    """Drop cached tenant records for the given hostnames."""
+    keys = [get_tenant_cache_key(hostname) for hostname in hostnames if hostname]
+    if keys:
+        cache.delete_many(keys)
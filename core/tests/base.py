@@ -0,0 +1,17 @@
+"""
+Test case base for the tenant apps.
+
+Tests run in the schema of a test tenant that is created and migrated once
+per test run; every test runs in a transaction that is rolled back, as with
+Django's TestCase.
+"""
+
+from django_tenants.test.cases import FastTenantTestCase
+
+
+class TenantTestCase(FastTenantTestCase):
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = "Test tenant"
+        # Client leaves schema creation to the admin; the test tenant needs it on save
+        tenant.auto_create_schema = True
@@ -0,0 +1,21 @@
+from unittest import mock
+
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from core import middleware
+from core.middleware import DatabaseRequestClassMiddleware
+
+
+class DatabaseRequestClassTests(SimpleTestCase):
+    def test_class_is_kept_until_the_response_is_closed(self):
+        connection = mock.Mock()
+        middleware_instance = DatabaseRequestClassMiddleware(
+            lambda request: StreamingHttpResponse(iter([b"{}"]))
+        )
+        with mock.patch.object(middleware, "connection", connection):
+            response = middleware_instance(RequestFactory().get("/api/locations/"))
+            b"".join(response)
+            connection.set_request_class.assert_called_once_with("api")
+            response.close()
+        connection.set_request_class.assert_called_with("batch")
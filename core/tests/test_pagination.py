@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+
+from django.db.models import FloatField, Q, Value
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase
+
+from core.pagination import KeysetPaginationMixin, get_annotated_ordering
+from core.tests.base import TenantTestCase
+from tenant_apps.users.models import CustomUser
+
+
+class UserKeyset(KeysetPaginationMixin):
+    keyset_ordering = ("-date_joined", "-id")
+
+    def __init__(self, cursor=None):
+        params = {"after": cursor} if cursor is not None else {}
+        self.request = RequestFactory().get("/", params)
+
+
+class KeysetCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        joined = datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+        cursor = UserKeyset().encode_cursor(CustomUser(id=7, date_joined=joined))
+        self.assertEqual(
+            UserKeyset(cursor).decode_cursor(), ["2026-01-02T03:04:05.123456+00:00", 7]
+        )
+
+    def test_first_page_has_no_cursor(self):
+        self.assertIsNone(UserKeyset().decode_cursor())
+        self.assertIsNone(UserKeyset("").decode_cursor())
+
+    def test_invalid_cursor(self):
+        # Not base64, not JSON, not a list, wrong number of values
+        for cursor in ("%%%", "bm90IGpzb24=", "eyJhIjogMX0=", "WzFd"):
+            with self.subTest(cursor=cursor), self.assertRaises(Http404):
+                UserKeyset(cursor).decode_cursor()
+
+    def test_keyset_filter(self):
+        condition = UserKeyset().get_keyset_filter(["2026-01-02", 7])
+        self.assertEqual(
+            condition,
+            Q(date_joined__lt="2026-01-02") | Q(date_joined="2026-01-02", id__lt=7),
+        )
+
+
+class AnnotatedOrderingTests(SimpleTestCase):
+    def test_search_annotations_take_precedence(self):
+        users = CustomUser.objects.all()
+        score = Value(1.0, output_field=FloatField())
+        cases = [
+            (users, ("name", "id")),
+            (users.annotate(distance=score), ("distance", "id")),
+            (users.annotate(search_rank=score), ("-search_rank", "id")),
+        ]
+        for queryset, ordering in cases:
+            with self.subTest(ordering=ordering):
+                self.assertEqual(
+                    get_annotated_ordering(queryset, ("name", "id")), ordering
+                )
+
+
+class KeysetPaginationTests(TenantTestCase):
+    def test_pages_cover_every_row_once(self):
+        joined = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for i in range(7):
+            # Pairs of users share date_joined, so pages break on the id
+            CustomUser.objects.create(
+                username=f"user{i}", date_joined=joined.replace(day=1 + i // 2)
+            )
+        expected = list(
+            CustomUser.objects.order_by("-date_joined", "-id").values_list(
+                "pk", flat=True
+            )
+        )
+
+        seen, cursor = [], None
+        while True:
+            view = UserKeyset(cursor)
+            _, _, page, is_paginated = view.paginate_queryset(
+                CustomUser.objects.all(), 3
+            )
+            seen.extend(user.pk for user in page)
+            cursor = view.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertTrue(is_paginated)
+
+    def test_sub_millisecond_values_are_kept(self):
+        joined = datetime(2026, 1, 1, 12, 0, 0, 123000, tzinfo=timezone.utc)
+        for i in range(4):
+            # All within one millisecond, in the opposite order of the ids
+            CustomUser.objects.create(
+                username=f"user{i}", date_joined=joined.replace(microsecond=123900 - i)
+            )
+        expected = list(
+            CustomUser.objects.order_by("-date_joined", "-id").values_list(
+                "pk", flat=True
+            )
+        )
+
+        seen, cursor = [], None
+        while True:
+            view = UserKeyset(cursor)
+            page = view.paginate_queryset(CustomUser.objects.all(), 1)[2]
+            seen.extend(user.pk for user in page)
+            if (cursor := view.next_cursor) is None:
+                break
+        self.assertEqual(seen, expected)
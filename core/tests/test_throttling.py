@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import throttling
+from core.throttling import TenantRateThrottle, TenantUserRateThrottle, TokenBucket
+
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class LocalTokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        TokenBucket._local_buckets.clear()
+
+    def test_consume_until_empty(self):
+        bucket = TokenBucket()
+        results = [bucket.consume("k", rate=0.001, capacity=2)[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+    def test_least_recently_used_buckets_are_dropped(self):
+        bucket = TokenBucket()
+        with mock.patch.object(throttling, "LOCAL_BUCKET_LIMIT", 2):
+            for key in ("a", "b", "a", "c"):
+                bucket.consume(key, rate=0.001, capacity=5)
+        self.assertEqual(list(TokenBucket._local_buckets), ["a", "c"])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class TenantThrottleTests(SimpleTestCase):
+    def setUp(self):
+        TokenBucket._local_buckets.clear()
+        self.tenant = SimpleNamespace(
+            schema_name="acme", api_rate_limit=60, api_user_rate_limit=1
+        )
+
+    def make_request(self):
+        request = RequestFactory().get("/")
+        request.tenant = self.tenant
+        request.user = SimpleNamespace(is_authenticated=True, pk=1)
+        return request
+
+    def check(self, request):
+        return [
+            throttle.allow_request(request, None)
+            for throttle in (TenantUserRateThrottle(), TenantRateThrottle())
+        ]
+
+    def test_user_denial_does_not_charge_the_tenant(self):
+        self.assertEqual(self.check(self.make_request()), [True, True])
+        self.assertEqual(self.check(self.make_request()), [False, True])
+        tokens, _ = TokenBucket._local_buckets["throttle:tenant:acme"]
+        self.assertLess(tokens, 60)
+        self.assertGreater(tokens, 58)
@@ -0,0 +1,216 @@
+# core/throttling.py
+"""
+Tenant-aware API throttling.
+
+Token buckets are keyed by tenant schema (and by user within a tenant) and
+consumed atomically with a Lua script on the Redis cache. When the configured
+cache is not Redis, or Redis is unreachable, a process-local bucket is used.
+
+The user throttle runs before the tenant throttle (see DEFAULT_THROTTLE_CLASSES)
+and a request it denies is not charged to the tenant bucket, so one client
+hammering the API does not use up the limit of the whole tenant.
+
+Map tiles and cluster cells come in dozens per pan or zoom, so their views use
+TenantTileRateThrottle instead: a per-user bucket with a much higher rate
+that is not charged to the tenant bucket.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name
+from rest_framework.throttling import BaseThrottle
+
+from core.tenant_utils import get_current_tenant
+
+logger = logging.getLogger(__name__)
+
+
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+# Most buckets kept by the in-process fallback; the least recently used are
+# dropped first, which only resets them to a full bucket
+LOCAL_BUCKET_LIMIT = 10000
+
+
+class TokenBucket:
+    """Token bucket stored in Redis, with an in-process fallback."""
+
+    _local_buckets = OrderedDict()
+    _local_lock = threading.Lock()
+
+    def __init__(self, cache_alias="default"):
+        self.cache = caches[cache_alias]
+        self._script = None
+
+    def _get_redis_client(self):
+        client = getattr(self.cache, "_cache", None)
+        if client is None or not hasattr(client, "get_client"):
+            return None
+        return client.get_client(write=True)
+
+    def consume(self, key, rate, capacity, cost=1):
+        """
+        Take `cost` tokens from the bucket at `key`.
+        `rate` is the refill in tokens per second, `capacity` the burst size.
+        Returns (allowed, remaining_tokens).
+        """
+        redis_client = self._get_redis_client()
+        if redis_client is not None:
+            try:
+                if self._script is None:
+                    self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+                allowed, tokens = self._script(
+                    keys=[self.cache.make_key(key)],
+                    args=[rate, capacity, cost],
+                    client=redis_client,
+                )
+                return bool(allowed), float(tokens)
+            except Exception as e:
+                logger.warning(f"Redis token bucket unavailable, using local bucket: {e}")
+        return self._consume_local(key, rate, capacity, cost)
+
+    def _consume_local(self, key, rate, capacity, cost):
+        now = time.monotonic()
+        with self._local_lock:
+            tokens, ts = self._local_buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._local_buckets[key] = (tokens, now)
+            self._local_buckets.move_to_end(key)
+            while len(self._local_buckets) > LOCAL_BUCKET_LIMIT:
+                self._local_buckets.popitem(last=False)
+        return allowed, tokens
+
+
+def record_throttled_request(schema_name, scope):
+    """Increment the hourly per-tenant counter of throttled requests."""
+    cache = caches[settings.TENANT_THROTTLE.get("CACHE_ALIAS", "default")]
+    hour = timezone.now().strftime("%Y%m%d%H")
+    key = f"throttle:count:{schema_name}:{scope}:throttled:{hour}"
+    try:
+        cache.add(key, 0, timeout=60 * 60 * 48)
+        cache.incr(key)
+    except Exception as e:
+        logger.debug(f"Could not record throttle counter {key}: {e}")
+
+
+class TenantRateThrottle(BaseThrottle):
+    """
+    Throttle shared by all requests of a tenant.
+    Limits come from the Client (requests per minute), falling back to
+    settings.TENANT_THROTTLE.
+    """
+
+    scope = "tenant"
+    client_rate_field = "api_rate_limit"
+    default_rate_setting = "TENANT_RATE"
+
+    def __init__(self):
+        self.bucket = TokenBucket(settings.TENANT_THROTTLE.get("CACHE_ALIAS", "default"))
+        self.retry_after = None
+
+    def get_cache_key(self, request, view, tenant):
+        return f"throttle:{self.scope}:{tenant.schema_name}"
+
+    def get_rate(self, tenant):
+        """Return the allowed number of requests per minute."""
+        rate = None
+        if self.client_rate_field:
+            rate = getattr(tenant, self.client_rate_field, None)
+        if rate:
+            return rate
+        return settings.TENANT_THROTTLE[self.default_rate_setting]
+
+    def allow_request(self, request, view):
+        tenant = getattr(request, "tenant", None) or get_current_tenant()
+        if tenant is None or tenant.schema_name == get_public_schema_name():
+            return True
+        django_request = getattr(request, "_request", request)
+        if getattr(django_request, "throttled", False):
+            # Already denied by an earlier throttle: do not charge this bucket
+            return True
+
+        per_minute = self.get_rate(tenant)
+        if not per_minute:
+            return True
+
+        rate = per_minute / 60.0
+        allowed, tokens = self.bucket.consume(
+            self.get_cache_key(request, view, tenant), rate, per_minute
+        )
+        remaining = int(tokens)
+        self.retry_after = None if allowed else (1 - tokens) / rate
+
+        self._record_state(request, per_minute, remaining)
+        if not allowed:
+            django_request.throttled = True
+            record_throttled_request(tenant.schema_name, self.scope)
+            logger.info(f"Throttled {self.scope} request for tenant {tenant.schema_name}")
+        return allowed
+
+    def _record_state(self, request, limit, remaining):
+        """Keep the tightest limit seen for the rate limit response headers."""
+        django_request = getattr(request, "_request", request)
+        current = getattr(django_request, "rate_limit", None)
+        if current is None or remaining < current["remaining"]:
+            django_request.rate_limit = {
+                "limit": limit,
+                "remaining": remaining,
+                "scope": self.scope,
+            }
+
+    def wait(self):
+        return self.retry_after
+
+
+class TenantUserRateThrottle(TenantRateThrottle):
+    """Throttle per user (or per client IP for anonymous requests) within a tenant."""
+
+    scope = "tenant_user"
+    client_rate_field = "api_user_rate_limit"
+    default_rate_setting = "USER_RATE"
+
+    def get_cache_key(self, request, view, tenant):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return f"throttle:{self.scope}:{tenant.schema_name}:{ident}"
+
+
+class TenantTileRateThrottle(TenantUserRateThrottle):
+    """Per-user throttle of map tiles and clusters, at TENANT_THROTTLE["TILE_RATE"]."""
+
+    scope = "tenant_tile"
+    client_rate_field = None
+    default_rate_setting = "TILE_RATE"
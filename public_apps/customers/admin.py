@@ -84,6 +84,14 @@ class ClientAdmin(admin.ModelAdmin):
                 "active_languages",
             ),
         }),
+        (_("Resource Limits"), {
+            "fields": (
+                "api_rate_limit",
+                "api_user_rate_limit",
+                "api_max_page_size",
+                "db_resource_limits",
+            ),
+        }),
         (_("Timestamps"), {
             "fields": (
                 "created_on",
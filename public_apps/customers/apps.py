@@ -7,3 +7,6 @@ class CustomersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "public_apps.customers"
     verbose_name = _("Customers")
+
+    def ready(self):
+        from . import signals  # noqa: F401
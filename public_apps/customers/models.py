@@ -104,6 +104,35 @@ def validate_schema_name(value):
         )
 
 
+DB_REQUEST_CLASSES = ["default", "api", "admin", "web", "batch"]
+DB_RESOURCE_LIMIT_SETTINGS = ["statement_timeout", "lock_timeout", "work_mem"]
+
+
+def validate_db_resource_limits(value):
+    """Validate per request class database limit overrides."""
+    if not value:
+        return
+    if not isinstance(value, dict):
+        raise ValidationError(_("Resource limits must be a JSON object."))
+    for request_class, limits in value.items():
+        if request_class not in DB_REQUEST_CLASSES or not isinstance(limits, dict):
+            raise ValidationError(
+                _("Unknown request class '%(value)s'."),
+                params={"value": request_class},
+            )
+        for name, limit in limits.items():
+            if name not in DB_RESOURCE_LIMIT_SETTINGS:
+                raise ValidationError(
+                    _("Unknown resource limit '%(value)s'."),
+                    params={"value": name},
+                )
+            if not re.match(r"^\d+\s*(ms|s|min|h|kB|MB|GB)?$", str(limit)):
+                raise ValidationError(
+                    _("Invalid value '%(value)s' for %(name)s."),
+                    params={"value": limit, "name": name},
+                )
+
+
 class Client(TenantMixin):
     """
     Tenant model representing an organization/client.
@@ -210,6 +239,35 @@ class Client(TenantMixin):
         default=True,
     )
 
+    # API limits
+    api_rate_limit = models.PositiveIntegerField(
+        _("API Rate Limit"),
+        blank=True,
+        null=True,
+        help_text=_("Requests per minute for the whole tenant. Empty uses the default."),
+    )
+    api_user_rate_limit = models.PositiveIntegerField(
+        _("API User Rate Limit"),
+        blank=True,
+        null=True,
+        help_text=_("Requests per minute for each user. Empty uses the default."),
+    )
+    api_max_page_size = models.PositiveIntegerField(
+        _("API Max Page Size"),
+        blank=True,
+        null=True,
+        help_text=_("Largest page size clients may request. Empty uses the default."),
+    )
+    db_resource_limits = models.JSONField(
+        _("Database Resource Limits"),
+        default=dict,
+        blank=True,
+        help_text=_(
+            "Overrides of statement_timeout, lock_timeout and work_mem per "
+            'request class, e.g. {"api": {"statement_timeout": "2s"}}.'
+        ),
+    )
+
     # Timestamps
     created_on = models.DateTimeField(
         _("Created On"),
@@ -236,6 +294,7 @@ class Client(TenantMixin):
         super().clean()
         if self.schema_name:
             validate_schema_name(self.schema_name)
+        validate_db_resource_limits(self.db_resource_limits)
 
     def save(self, *args, **kwargs):
         # Auto-generate schema name if not set
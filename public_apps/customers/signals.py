@@ -0,0 +1,32 @@
+# public_apps/customers/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.tenant_utils import invalidate_tenant_cache
+from .models import Client, Domain
+
+
+@receiver(post_save, sender=Client)
+def invalidate_client_domains(sender, instance, **kwargs):
+    """Drop cached routing entries for every domain of a changed tenant."""
+    hostnames = [domain.domain for domain in instance.domains.all()]
+    invalidate_tenant_cache(*hostnames)
+
+
+@receiver(pre_save, sender=Domain)
+def invalidate_renamed_domain(sender, instance, **kwargs):
+    """Drop the cached entry of the previous hostname when a domain is renamed."""
+    if not instance.pk:
+        return
+    previous = (
+        Domain.objects.filter(pk=instance.pk).values_list("domain", flat=True).first()
+    )
+    if previous and previous != instance.domain:
+        invalidate_tenant_cache(previous)
+
+
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def invalidate_domain(sender, instance, **kwargs):
+    """Drop the cached routing entry of a changed domain."""
+    invalidate_tenant_cache(instance.domain)
@@ -1,8 +1,39 @@
+import os
+
+from django import forms
 from django.contrib.gis import admin as gis_admin
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.translation import gettext_lazy as _
 
 from core.admin_utils import register_tenant_only
-from .models import LocationType, Location, MapLayer
+from .models import LocationImport, LocationType, Location, MapLayer, MapOverlay
+
+IMPORT_EXTENSIONS = [".geojson", ".json", ".csv", ".gpkg", ".zip", ".kml", ".gml"]
+
+
+class LocationImportForm(forms.Form):
+    file = forms.FileField(
+        label=_("File"),
+        help_text=_("GeoJSON, CSV, GeoPackage, KML or a zipped Shapefile."),
+    )
+    srid = forms.IntegerField(
+        label=_("Source SRID"),
+        required=False,
+        help_text=_("Only needed when the file does not declare its projection."),
+    )
+    geocode = forms.BooleanField(
+        label=_("Geocode rows without coordinates"), required=False
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if os.path.splitext(upload.name)[1].lower() not in IMPORT_EXTENSIONS:
+            raise forms.ValidationError(_("Unsupported file type."))
+        return upload
 
 
 @register_tenant_only(LocationType)
@@ -25,6 +56,91 @@ class LocationAdmin(gis_admin.GISModelAdmin):
     list_filter = ("is_active", "location_type", "canton")
     search_fields = ("name", "description", "city", "street")
     raw_id_fields = ("location_type",)
+    change_list_template = "admin/geomap/location/change_list.html"
+
+    def get_urls(self):
+        urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="geomap_location_import",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """Upload a location file and queue it for the import runner."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = LocationImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            LocationImport.objects.create(
+                file=upload,
+                original_name=upload.name,
+                options={
+                    "srid": form.cleaned_data["srid"],
+                    "geocode": form.cleaned_data["geocode"],
+                },
+                created_by=request.user,
+            )
+            messages.success(
+                request,
+                _("Import of %(name)s queued.") % {"name": upload.name},
+            )
+            return redirect(
+                reverse(
+                    "admin:geomap_locationimport_changelist",
+                    current_app=self.admin_site.name,
+                )
+            )
+
+        request.current_app = self.admin_site.name
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "form": form,
+            "title": _("Import locations"),
+        }
+        return TemplateResponse(request, "admin/geomap/location/import.html", context)
+
+
+@register_tenant_only(LocationImport)
+class LocationImportAdmin(admin.ModelAdmin):
+    list_display = (
+        "original_name",
+        "status",
+        "created_by",
+        "created_at",
+        "started_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    readonly_fields = (
+        "file",
+        "original_name",
+        "options",
+        "status",
+        "result",
+        "error",
+        "created_by",
+        "started_at",
+        "finished_at",
+    )
+    actions = ["retry_imports"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description=_("Retry the selected failed imports"))
+    def retry_imports(self, request, queryset):
+        count = queryset.filter(status="failed").exclude(file="").update(
+            status="pending", error="", started_at=None, finished_at=None
+        )
+        self.message_user(
+            request, _("%(count)d imports queued again.") % {"count": count}
+        )
 
 
 @register_tenant_only(MapLayer)
@@ -40,3 +156,11 @@ class MapLayerAdmin(admin.ModelAdmin):
     list_filter = ("is_active", "is_default")
     search_fields = ("name",)
     list_editable = ("sort_order", "is_active", "is_default")
+
+
+@register_tenant_only(MapOverlay)
+class MapOverlayAdmin(gis_admin.GISModelAdmin):
+    list_display = ("name", "color", "is_active", "sort_order", "updated_at")
+    list_filter = ("is_active",)
+    search_fields = ("name", "description")
+    list_editable = ("sort_order", "is_active")
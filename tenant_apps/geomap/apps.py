@@ -5,3 +5,6 @@ class GeomapConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tenant_apps.geomap"
     verbose_name = "GeoMap"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,274 @@
+"""
+Async-native read views for locations, location types and map layers.
+
+Under ASGI the DRF viewsets run in a thread through sync_to_async, holding
+that thread for the whole request. These views are coroutines: queries go
+through the async ORM (`aiterator`, `acount`, `aget`), so a slow client
+waiting on a response holds no thread, and one worker can serve many of
+them at once.
+
+The async ORM runs each query in the request's thread-sensitive executor
+thread. Every view activates the request's tenant schema on that thread
+before its first query, instead of relying on whichever schema the
+thread's connection was last left with.
+
+Requests go through the same DRF authentication, permission and throttle
+classes as the API. Location responses are served from the tenant response
+cache (see response_cache.py), and location type and map layer lists carry
+the same ETag / Last-Modified validators as their viewsets.
+
+Objects have the same fields as in the DRF APIs of the same resources.
+"""
+
+import abc
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.text import compress_string
+from django.utils.translation import get_language
+from django.views import View
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from core.pagination import (
+    KeysetPaginationMixin,
+    get_annotated_ordering,
+    get_requested_page_size,
+)
+
+from .cache import get_table_state, make_etag
+from .filters import LocationFilter
+from .models import Location, LocationType, MapLayer
+from .response_cache import (
+    cached_response,
+    get_response_cache,
+    normalize_query,
+    versioned_cache_key,
+)
+from .serializers import LocationTypeSerializer, MapLayerSerializer
+from .streaming import LOCATION_STREAM_FIELDS, location_feature
+
+
+async def activate_tenant(tenant):
+    """Set the tenant schema on the thread that runs the async ORM queries."""
+    await sync_to_async(connection.set_tenant)(tenant)
+
+
+class APIAccessView(APIView):
+    """Runs the API's authentication, permission and throttle checks only."""
+
+    permission_classes = [IsAuthenticated]
+
+    def check_access(self, request):
+        """Error response for `request`, or None when it may proceed."""
+        self.args, self.kwargs = (), {}
+        self.headers = self.default_response_headers
+        self.request = self.initialize_request(request)
+        try:
+            self.initial(self.request)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+            return self.finalize_response(self.request, response).render()
+        return None
+
+
+class AsyncReadView(abc.ABC, View):
+    """
+    Activates the request's tenant and applies the API access checks, then
+    answers with `read()`. With `cache_models`, responses are stored in the
+    tenant response cache and invalidated when one of those models changes.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    cache_models = ()
+
+    async def get(self, request, *args, **kwargs):
+        await activate_tenant(request.tenant)
+        refused = await sync_to_async(APIAccessView().check_access)(request)
+        if refused is not None:
+            return refused
+        if self.cache_models:
+            response = await self.cached_read(request, *args, **kwargs)
+        else:
+            response = await self.read(request, *args, **kwargs)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    @abc.abstractmethod
+    async def read(self, request, *args, **kwargs):
+        """Build the response of a GET request."""
+
+    def get_cache_key(self, request, kwargs):
+        variant = "|".join(
+            [
+                f"async.{type(self).__name__}",
+                ",".join(f"{k}={v}" for k, v in sorted(kwargs.items())),
+                normalize_query(request.GET),
+                request.scheme,
+                request.get_host(),
+                get_language() or "",
+            ]
+        )
+        return versioned_cache_key(self.cache_models, variant)
+
+    async def cached_read(self, request, *args, **kwargs):
+        response_cache = get_response_cache()
+        key = await sync_to_async(self.get_cache_key)(request, kwargs)
+        entry = await response_cache.aget(key)
+        if entry is not None:
+            return cached_response(request, entry)
+        response = await self.read(request, *args, **kwargs)
+        if response.status_code == 200:
+            await response_cache.aset(
+                key,
+                (response["Content-Type"], compress_string(response.content)),
+                getattr(settings, "GEOMAP_RESPONSE_CACHE_TIMEOUT", 300),
+            )
+        return response
+
+
+class AsyncLocationListView(KeysetPaginationMixin, AsyncReadView):
+    """
+    Active locations as a GeoJSON FeatureCollection, filtered with the
+    LocationFilter parameters and keyset-paginated (`?after=` takes the
+    `next` cursor) in the order of the locations API: by name, by distance
+    for `near`, by rank for `q`. The total `count` is cached per filter
+    with the responses, so later pages do not count again. `nearest` is not
+    supported: its results are a fixed distance-ordered slice.
+    """
+
+    keyset_ordering = ("name", "id")
+    paginate_by = 100
+    cache_models = (Location, LocationType)
+
+    def filter_queryset(self):
+        """Validate the filters (may query location types) and build the qs."""
+        if self.request.GET.get("nearest"):
+            # KNN results are a distance-ordered slice, not keyset pages
+            return None, {"nearest": ["Not supported here, use the locations API."]}
+        queryset = Location.objects.filter(is_active=True)
+        filterset = LocationFilter(self.request.GET, queryset=queryset)
+        try:
+            if not filterset.is_valid():
+                return None, filterset.errors
+            return filterset.qs, None
+        except ParseError as e:
+            return None, {"detail": e.detail}
+
+    def get_count_key(self, request):
+        query = request.GET.copy()
+        for param in (self.cursor_param, "page_size"):
+            query.pop(param, None)
+        variant = f"async.{type(self).__name__}.count|{normalize_query(query)}"
+        return versioned_cache_key(self.cache_models, variant)
+
+    async def get_count(self, request, queryset):
+        response_cache = get_response_cache()
+        key = await sync_to_async(self.get_count_key)(request)
+        count = await response_cache.aget(key)
+        if count is None:
+            count = await queryset.acount()
+            await response_cache.aset(
+                key, count, getattr(settings, "GEOMAP_RESPONSE_CACHE_TIMEOUT", 300)
+            )
+        return count
+
+    async def read(self, request):
+        queryset, errors = await sync_to_async(self.filter_queryset)()
+        if errors is not None:
+            return JsonResponse(errors, status=400)
+
+        count = await self.get_count(request, queryset)
+        page_size = get_requested_page_size(request, self.paginate_by)
+        self.keyset_ordering = get_annotated_ordering(queryset, self.keyset_ordering)
+        queryset = queryset.order_by(*self.keyset_ordering)
+        values = self.decode_cursor()
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(values))
+            except ValidationError:
+                raise Http404("Invalid cursor.")
+
+        keys = [field.lstrip("-") for field in self.keyset_ordering]
+        fields = [
+            *LOCATION_STREAM_FIELDS,
+            *(key for key in keys if key not in LOCATION_STREAM_FIELDS),
+        ]
+        rows = [row async for row in queryset[: page_size + 1].values(*fields)]
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = self.encode_cursor(SimpleNamespace(**rows[-1]))
+        features = []
+        for row in rows:
+            row.pop("search_rank", None)
+            features.append(location_feature(row, request))
+        return JsonResponse(
+            {
+                "count": count,
+                "next": next_cursor,
+                "results": {"type": "FeatureCollection", "features": features},
+            }
+        )
+
+
+class AsyncLocationDetailView(AsyncReadView):
+    """One active location as a GeoJSON feature."""
+
+    cache_models = (Location, LocationType)
+
+    async def read(self, request, pk):
+        try:
+            row = await (
+                Location.objects.filter(is_active=True)
+                .values(*LOCATION_STREAM_FIELDS)
+                .aget(pk=pk)
+            )
+        except Location.DoesNotExist:
+            raise Http404
+        return JsonResponse(location_feature(row, request))
+
+
+class AsyncModelListView(AsyncReadView):
+    """
+    Active rows of `model` with the fields of `serializer_class`, with
+    validators from the cached table state (see cache.get_table_state).
+    """
+
+    model = None
+    serializer_class = None
+
+    async def read(self, request):
+        last_modified, table_etag = await sync_to_async(get_table_state)(self.model)
+        etag = '"%s"' % make_etag(f"{table_etag}:{request.get_full_path()}".encode())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            fields = self.serializer_class.Meta.fields
+            queryset = self.model.objects.filter(is_active=True).values(*fields)
+            results = [row async for row in queryset.aiterator()]
+            response = JsonResponse({"count": len(results), "results": results})
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+class AsyncLocationTypeListView(AsyncModelListView):
+    model = LocationType
+    serializer_class = LocationTypeSerializer
+
+
+class AsyncMapLayerListView(AsyncModelListView):
+    model = MapLayer
+    serializer_class = MapLayerSerializer
@@ -0,0 +1,203 @@
+"""
+Bulk upsert of locations keyed by `external_id`.
+
+Features are read from a GeoJSON FeatureCollection or a newline-delimited
+stream of features (NDJSON / GeoJSONSeq) and processed in chunks. Each
+chunk is validated row by row (without per-row queries), then written with
+one INSERT ... ON CONFLICT (external_id) DO UPDATE in its own transaction,
+so a failing chunk never rolls back the ones before it. Invalid rows are
+reported with their index and skipped.
+"""
+
+import json
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework_gis.serializers import GeoFeatureModelSerializer
+
+from .cache import bump_data_version
+from .events import publish_reload
+from .models import Location, LocationType
+from .response_cache import bump_model_version
+from .search import update_search_vectors
+from .stats import rebuild_statistics
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPES = (
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/geo+json-seq",
+)
+BULK_UPDATE_FIELDS = [
+    "name",
+    "description",
+    "location_type",
+    "point",
+    "street",
+    "street_number",
+    "zip_code",
+    "city",
+    "canton",
+    "is_active",
+    "website",
+    "phone",
+    "email",
+    "updated_at",
+]
+
+
+class LocationBulkSerializer(GeoFeatureModelSerializer):
+    """
+    Validates one feature of a bulk upsert. Declared fields avoid the
+    per-row uniqueness and foreign key queries of the model serializer;
+    location types are checked per chunk instead.
+    """
+
+    external_id = serializers.CharField(max_length=100)
+    location_type = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Location
+        geo_field = "point"
+        fields = ["external_id", *BULK_UPDATE_FIELDS[:-1]]
+
+
+def iter_features(request):
+    """Yield the features of a bulk request body."""
+    stream = request.stream
+    if stream is None:
+        raise ParseError("Empty request body.")
+
+    content_type = request.content_type.split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        for number, line in enumerate(stream, start=1):
+            line = line.strip().lstrip(b"\x1e")
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise ParseError(f"Invalid JSON on line {number}.")
+        return
+
+    try:
+        collection = json.load(stream)
+    except ValueError:
+        raise ParseError("Invalid JSON body.")
+    if not isinstance(collection, dict) or collection.get("type") != "FeatureCollection":
+        raise ParseError("Expected a GeoJSON FeatureCollection.")
+    yield from collection.get("features") or []
+
+
+def _row_error(index, feature, errors):
+    properties = feature.get("properties") if isinstance(feature, dict) else None
+    external_id = properties.get("external_id") if isinstance(properties, dict) else None
+    return {"index": index, "external_id": external_id, "errors": errors}
+
+
+def _key_error(index, external_id, field, message):
+    return _row_error(
+        index, {"properties": {"external_id": external_id}}, {field: [message]}
+    )
+
+
+def _validate_chunk(serializer, chunk, errors):
+    """Return {external_id: (index, validated_data)} for the valid rows."""
+    rows = {}
+    for index, feature in chunk:
+        try:
+            data = serializer.run_validation(feature)
+        except ValidationError as e:
+            errors.append(_row_error(index, feature, e.detail))
+            continue
+        previous = rows.get(data["external_id"])
+        if previous is not None:
+            errors.append(
+                _key_error(
+                    previous[0],
+                    data["external_id"],
+                    "external_id",
+                    "Superseded by a later row with this external_id.",
+                )
+            )
+        rows[data["external_id"]] = (index, data)
+
+    type_ids = {data.get("location_type") for _, data in rows.values()} - {None}
+    known_types = set(
+        LocationType.objects.filter(pk__in=type_ids).values_list("pk", flat=True)
+    )
+    for external_id, (index, data) in list(rows.items()):
+        type_id = data.get("location_type")
+        if type_id is not None and type_id not in known_types:
+            errors.append(
+                _key_error(
+                    index,
+                    external_id,
+                    "location_type",
+                    f'Invalid pk "{type_id}" - object does not exist.',
+                )
+            )
+            del rows[external_id]
+    return rows
+
+
+def _write_chunk(rows):
+    locations = []
+    for _, data in rows.values():
+        data = dict(data)
+        data["location_type_id"] = data.pop("location_type", None)
+        locations.append(Location(**data))
+    with transaction.atomic():
+        Location.objects.bulk_create(
+            locations,
+            update_conflicts=True,
+            unique_fields=["external_id"],
+            update_fields=[*BULK_UPDATE_FIELDS, "change_xid"],
+        )
+        update_search_vectors(Location.objects.filter(external_id__in=list(rows)))
+
+
+def bulk_upsert(features, chunk_size=None):
+    """
+    Upsert `features` in chunks and return a report with the number of
+    received, upserted and failed rows and the per-row errors.
+    """
+    chunk_size = chunk_size or getattr(settings, "GEOMAP_BULK_CHUNK_SIZE", 1000)
+    serializer = LocationBulkSerializer()
+    numbered = enumerate(features)
+    received = upserted = 0
+    errors = []
+
+    while chunk := list(islice(numbered, chunk_size)):
+        received += len(chunk)
+        rows = _validate_chunk(serializer, chunk, errors)
+        if not rows:
+            continue
+        try:
+            _write_chunk(rows)
+        except DatabaseError as e:
+            logger.warning(f"Bulk location chunk failed: {e}")
+            for external_id, (index, _) in rows.items():
+                errors.append(
+                    _key_error(index, external_id, "non_field_errors", str(e))
+                )
+            continue
+        upserted += len(rows)
+
+    if upserted:
+        bump_data_version()
+        bump_model_version(Location)
+        rebuild_statistics()
+        publish_reload()
+    errors.sort(key=lambda error: error["index"])
+    return {
+        "received": received,
+        "upserted": upserted,
+        "failed": len(errors),
+        "errors": errors,
+    }
@@ -0,0 +1,231 @@
+"""
+Cache for generated map tiles (vector tiles and cluster tiles).
+
+Keys combine the tenant schema, the tenant's geomap data version and the
+z/x/y tile. Changes to locations or location types bump the data version,
+which orphans every cached tile of the tenant at once. Tile bodies may live
+in a per-node cache (GEOMAP_TILE_CACHE_ALIAS, e.g. on local disk), but the
+version counters are kept in the cache shared by all nodes
+(GEOMAP_VERSION_CACHE_ALIAS), so a bump on one node reaches every node and
+is atomic. With
+GEOMAP_TILE_INVALIDATION = "precise", location changes instead delete only
+the tiles rendering the old and new positions at every zoom level.
+
+Entries are stored with an ETag (hash of the content) so responses can be
+revalidated with If-None-Match.
+
+The shared version cache also holds the last modification and ETag of
+small read-only tables (location types, map layers) for conditional API
+requests, so every node revalidates against the same state. The state is
+refreshed by the save/delete signals and TableStateQuerySet bulk writes,
+and expires after GEOMAP_TABLE_STATE_TIMEOUT seconds to pick up any other
+write (raw SQL must set updated_at for its changes to show).
+"""
+
+import hashlib
+import logging
+import math
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from core.tenant_utils import get_schema_name
+
+from .tiles import MAX_TILE_ZOOM, MVT_BUFFER, MVT_EXTENT
+
+logger = logging.getLogger(__name__)
+
+TILE_KINDS = ("mvt", "clusters")
+DATA_VERSION_TIMEOUT = None
+
+
+def get_tile_cache():
+    return caches[getattr(settings, "GEOMAP_TILE_CACHE_ALIAS", "default")]
+
+
+def get_version_cache():
+    return caches[getattr(settings, "GEOMAP_VERSION_CACHE_ALIAS", "default")]
+
+
+def _version_key():
+    return f"geomap:version:{get_schema_name()}"
+
+
+def get_data_version():
+    """Current geomap data version of the tenant."""
+    version_cache = get_version_cache()
+    version = version_cache.get(_version_key())
+    if version is None:
+        version_cache.add(_version_key(), 1, timeout=DATA_VERSION_TIMEOUT)
+        version = version_cache.get(_version_key(), 1)
+    return version
+
+
+def bump_data_version():
+    """Invalidate every cached tile of the current tenant."""
+    version_cache = get_version_cache()
+    try:
+        version_cache.add(_version_key(), 1, timeout=DATA_VERSION_TIMEOUT)
+        return version_cache.incr(_version_key())
+    except ValueError:
+        version_cache.set(_version_key(), 2, timeout=DATA_VERSION_TIMEOUT)
+        return 2
+
+
+def tile_cache_key(kind, z, x, y, variant=None, version=None):
+    if version is None:
+        version = get_data_version()
+    return (
+        f"geomap:{kind}:{get_schema_name()}:v{version}:"
+        f"{z}/{x}/{y}:{variant or 'all'}"
+    )
+
+
+def make_etag(content):
+    return hashlib.md5(content).hexdigest()
+
+
+def get_or_create_tile(kind, z, x, y, build, variant=None, encode=None):
+    """
+    Return (etag, content) for a tile, building and caching it on a miss.
+    `encode` turns non-bytes content into bytes for the ETag.
+    """
+    tile_cache = get_tile_cache()
+    key = tile_cache_key(kind, z, x, y, variant)
+    cached = tile_cache.get(key)
+    if cached is not None:
+        return cached
+
+    content = build()
+    etag = make_etag(encode(content) if encode else content)
+    tile_cache.set(
+        key, (etag, content), getattr(settings, "GEOMAP_TILE_CACHE_TIMEOUT", 86400)
+    )
+    return etag, content
+
+
+def tile_position(lon, lat, zoom):
+    """Fractional XYZ tile coordinates of a lon/lat position."""
+    n = 2 ** zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+    return x, y
+
+
+def tile_for_point(lon, lat, zoom):
+    """Return the XYZ tile containing a lon/lat position."""
+    n = 2 ** zoom
+    x, y = tile_position(lon, lat, zoom)
+    return min(max(int(x), 0), n - 1), min(max(int(y), 0), n - 1)
+
+
+def tiles_around_point(lon, lat, zoom, margin):
+    """
+    XYZ tiles whose envelope, grown by `margin` (a fraction of the tile size,
+    like ST_TileEnvelope's), contains a lon/lat position.
+    """
+    n = 2 ** zoom
+    x, y = tile_position(lon, lat, zoom)
+    xs = range(max(math.floor(x - margin), 0), min(math.floor(x + margin), n - 1) + 1)
+    ys = range(max(math.floor(y - margin), 0), min(math.floor(y + margin), n - 1) + 1)
+    return [(tx, ty) for tx in xs for ty in ys]
+
+
+def invalidate_point_tiles(points, variants):
+    """
+    Delete the cached tiles rendering each point at every tile zoom level
+    (up to MAX_TILE_ZOOM, which also caps cluster tiles), for the unfiltered
+    tile and each of the given location type variants.
+    Vector tiles include the points of a buffer around the tile, so the
+    neighbouring tiles whose buffer reaches the point are deleted too.
+    """
+    margin = MVT_BUFFER / MVT_EXTENT
+    version = get_data_version()
+    keys = set()
+    for point in points:
+        if point is None:
+            continue
+        for z in range(MAX_TILE_ZOOM + 1):
+            for x, y in tiles_around_point(point.x, point.y, z, margin):
+                for kind in TILE_KINDS:
+                    for variant in {None, *variants}:
+                        keys.add(tile_cache_key(kind, z, x, y, variant, version))
+    if keys:
+        get_tile_cache().delete_many(list(keys))
+
+
+def invalidate_location(old=None, new=None):
+    """Invalidate cached tiles after a location change."""
+    mode = getattr(settings, "GEOMAP_TILE_INVALIDATION", "version")
+    if mode != "precise":
+        bump_data_version()
+        return
+
+    points = [obj.point for obj in (old, new) if obj is not None]
+    variants = {
+        str(obj.location_type_id)
+        for obj in (old, new)
+        if obj is not None and obj.location_type_id
+    }
+    try:
+        invalidate_point_tiles(points, variants)
+    except Exception as e:
+        logger.warning(f"Precise tile invalidation failed, bumping version: {e}")
+        bump_data_version()
+
+
+# ==========================================
+# TABLE STATE (conditional requests)
+# ==========================================
+
+
+def get_table_state_timeout():
+    return getattr(settings, "GEOMAP_TABLE_STATE_TIMEOUT", 60)
+
+
+def _table_state_key(model):
+    return f"geomap:table:{get_schema_name()}:{model._meta.label_lower}"
+
+
+def _compute_table_state(model, touched_at=None):
+    state = model._default_manager.aggregate(
+        last_modified=Max("updated_at"), count=Count("pk")
+    )
+    last_modified = state["last_modified"]
+    if touched_at is not None:
+        last_modified = max(filter(None, [last_modified, touched_at]))
+    stamp = last_modified.isoformat() if last_modified else ""
+    label = f"{get_schema_name()}:{model._meta.label_lower}"
+    return last_modified, make_etag(f"{label}:{stamp}:{state['count']}".encode())
+
+
+def get_table_state(model):
+    """
+    (last_modified, etag) of a tenant table: its latest `updated_at` and a
+    hash that also covers the row count. Cached until the table changes, or
+    at most GEOMAP_TABLE_STATE_TIMEOUT seconds, so revalidating a request
+    rarely costs a query.
+    """
+    version_cache = get_version_cache()
+    key = _table_state_key(model)
+    state = version_cache.get(key)
+    if state is None:
+        state = _compute_table_state(model)
+        version_cache.set(key, state, timeout=get_table_state_timeout())
+    return state
+
+
+def touch_table_state(model, deleted=False):
+    """
+    Refresh the cached state after a change. A deletion does not move
+    max(updated_at), so the deletion time is used as last modification.
+    """
+    touched_at = timezone.now() if deleted else None
+    get_version_cache().set(
+        _table_state_key(model),
+        _compute_table_state(model, touched_at),
+        timeout=get_table_state_timeout(),
+    )
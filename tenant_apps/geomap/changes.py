@@ -0,0 +1,187 @@
+"""
+Change feed of locations for incremental client sync.
+
+A client keeps a local replica and repeatedly asks for the changes after its
+cursor. The cursor holds two keyset positions: (change_xid, id) in Location
+for created and updated rows, and (change_xid, id) in LocationTombstone for
+deleted rows. Both are read in index order with a page limit, so a sync
+costs the same however large the tenant is.
+
+Positions are transaction ids rather than timestamps, so they follow commit
+visibility: `change_xid` is the id of the transaction that last wrote the
+row (set by Location.save(), queryset updates, the bulk upsert and import
+merges, and the deletion of its location type), and each page stops at the
+oldest transaction still running, below which every transaction has
+finished. A bulk upsert or import batch therefore holds the feed back until
+it commits instead of having its rows slip behind cursors that already
+moved on.
+
+Running transactions are those of the whole cluster, not of the tenant, so
+transactions older than GEOMAP_CHANGES_MAX_LAG_SECONDS no longer hold the
+horizon: one long-running batch statement (the batch request class has no
+statement timeout) would otherwise freeze the feed of every tenant. Rows
+written by such a transaction may be missed by replicas that synced while
+it ran; imports commit per batch and stay well below the limit.
+
+Deactivated locations are reported as deleted, like hard deletes.
+Tombstones are kept for GEOMAP_TOMBSTONE_RETENTION_DAYS and purged by the
+purge_location_tombstones command; older cursors get 410 and must resync.
+"""
+
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException, ParseError
+
+from .models import Location, LocationTombstone
+
+
+class CursorExpired(APIException):
+    status_code = 410
+    default_detail = _("The change history of this cursor has expired, resync.")
+    default_code = "cursor_expired"
+
+
+def get_retention():
+    return timedelta(days=getattr(settings, "GEOMAP_TOMBSTONE_RETENTION_DAYS", 30))
+
+
+# In-progress transactions of the current snapshot, except those started
+# more than %s seconds ago; without any, the next transaction id to assign.
+# Transactions of backends whose start time is hidden (other roles without
+# pg_read_all_stats) are kept.
+HORIZON_SQL = """
+    WITH snapshot AS (SELECT pg_current_snapshot() AS s)
+    SELECT LEAST(
+        (SELECT pg_snapshot_xmax(s)::text::bigint FROM snapshot),
+        (
+            SELECT min(x::text::bigint)
+            FROM snapshot, pg_snapshot_xip(s) AS x
+            LEFT JOIN pg_stat_activity a ON a.backend_xid = x::xid
+            WHERE a.xact_start IS NULL
+                OR a.xact_start > now() - make_interval(secs => %s)
+        )
+    )
+"""
+
+
+def get_max_lag():
+    return getattr(settings, "GEOMAP_CHANGES_MAX_LAG_SECONDS", 300)
+
+
+def get_horizon():
+    """
+    Lowest transaction id still running, ignoring transactions older than
+    the maximum lag: every lower one has finished.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(HORIZON_SQL, [get_max_lag()])
+        return cursor.fetchone()[0]
+
+
+def encode_cursor(updated, deleted, issued_at):
+    """Encode the (xid, id) positions of both streams and the issue time."""
+    values = [*updated, *deleted, issued_at.isoformat()]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        location_xid, location_id, tombstone_xid, tombstone_id, issued_at = values
+        updated = (int(location_xid), int(location_id))
+        deleted = (int(tombstone_xid), int(tombstone_id))
+        issued_at = parse_datetime(issued_at)
+    except (binascii.Error, TypeError, ValueError):
+        raise ParseError("Invalid since cursor.")
+    if issued_at is None:
+        raise ParseError("Invalid since cursor.")
+    return updated, deleted, issued_at
+
+
+def _after(position):
+    xid, pk = position
+    return Q(change_xid__gt=xid) | Q(change_xid=xid, pk__gt=pk)
+
+
+def _next_position(rows, limit, horizon):
+    """Position after the page, or the horizon once the stream is drained."""
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        return last.change_xid, last.pk
+    return horizon, 0
+
+
+def record_deletion(location):
+    """Store a tombstone for a deleted location."""
+    LocationTombstone.objects.create(
+        location_id=location.pk, external_id=location.external_id or ""
+    )
+
+
+def purge_expired_tombstones():
+    """Drop the tombstones older than the retention; return how many."""
+    deleted, _ = LocationTombstone.objects.filter(
+        deleted_at__lt=timezone.now() - get_retention()
+    ).delete()
+    return deleted
+
+
+def get_changes(since=None, limit=500):
+    """
+    Changes after the `since` cursor (everything when None), as a dict with
+    `created` and `updated` Location lists, `deleted` ids, the next `cursor`
+    and `has_more` when the client should ask again right away.
+    """
+    now = timezone.now()
+    horizon = get_horizon()
+    if since:
+        updated_position, deleted_position, issued_at = decode_cursor(since)
+        if issued_at < now - get_retention():
+            raise CursorExpired()
+    else:
+        # A new replica has nothing to delete: start the tombstones here
+        updated_position, deleted_position = (0, 0), (horizon, 0)
+
+    locations = list(
+        Location.objects.filter(_after(updated_position))
+        .filter(change_xid__lt=horizon)
+        .select_related("location_type")
+        .defer("search_vector")
+        .order_by("change_xid", "id")[: limit + 1]
+    )
+    tombstones = list(
+        LocationTombstone.objects.filter(_after(deleted_position))
+        .filter(change_xid__lt=horizon)
+        .order_by("change_xid", "id")[: limit + 1]
+    )
+
+    created, updated, deleted = [], [], []
+    for location in locations[:limit]:
+        if not location.is_active:
+            deleted.append(location.pk)
+        elif (location.created_xid, location.pk) > updated_position:
+            created.append(location)
+        else:
+            updated.append(location)
+    deleted.extend(tombstone.location_id for tombstone in tombstones[:limit])
+
+    return {
+        "created": created,
+        "updated": updated,
+        "deleted": deleted,
+        "cursor": encode_cursor(
+            _next_position(locations, limit, horizon),
+            _next_position(tombstones, limit, horizon),
+            now,
+        ),
+        "has_more": len(locations) > limit or len(tombstones) > limit,
+    }
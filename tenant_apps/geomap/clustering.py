@@ -0,0 +1,140 @@
+"""
+Server-side marker clustering.
+
+Points are snapped to a zoom-dependent grid in PostGIS (ST_SnapToGrid) and
+aggregated per grid cell and location type. Work is split along XYZ tiles so
+each tile's aggregates can be cached independently in the tile cache; the
+tile results are merged into clusters for the requested bbox.
+"""
+
+import hashlib
+import json
+
+from django.contrib.gis.db.models.functions import SnapToGrid
+from django.db.models import Avg, Count
+from rest_framework.exceptions import ParseError
+from rest_framework_gis.tilenames import tile_edges
+
+from .cache import get_or_create_tile, tile_for_point
+from .filters import bbox_polygon
+from .functions import X, Y
+from .tiles import MAX_TILE_ZOOM
+
+# Size of a cluster cell in screen pixels (256px tiles)
+CLUSTER_CELL_PIXELS = 64
+MAX_CLUSTER_TILES = 64
+
+
+def tiles_for_bbox(bbox, zoom):
+    """List the (x, y) tiles at `zoom` covering a lon/lat bbox."""
+    minx, miny, maxx, maxy = bbox
+    x0, y0 = tile_for_point(minx, maxy, zoom)
+    x1, y1 = tile_for_point(maxx, miny, zoom)
+    tiles = [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+    if len(tiles) > MAX_CLUSTER_TILES:
+        raise ParseError("bbox is too large for this zoom level.")
+    return tiles
+
+
+def cell_size(zoom):
+    """
+    Grid cell size in degrees, CLUSTER_CELL_PIXELS wide on screen.
+
+    Cells are snapped in EPSG:4326, so they line up with tile columns but not
+    with tile rows (Web Mercator rows are not uniform in latitude), and they
+    grow taller on screen away from the equator. A cell split by a tile row
+    is merged back by merge_clusters when both tiles are requested.
+    """
+    return 360.0 / (2 ** zoom) * CLUSTER_CELL_PIXELS / 256
+
+
+def cluster_tile(queryset, zoom, x, y):
+    """Aggregate the locations of one tile per grid cell and location type."""
+    west, south, east, north = tile_edges(x, y, zoom)
+    rows = (
+        queryset.alias(lon=X("point"), lat=Y("point"))
+        .filter(
+            point__bboverlaps=bbox_polygon((west, south, east, north)),
+            lon__gte=west,
+            lon__lt=east,
+            lat__gte=south,
+            lat__lt=north,
+        )
+        .annotate(cell=SnapToGrid("point", cell_size(zoom)))
+        .values("cell", "location_type")
+        .annotate(
+            count=Count("id"),
+            avg_lon=Avg(X("point")),
+            avg_lat=Avg(Y("point")),
+        )
+        .order_by()
+    )
+    return [
+        {
+            "cell": (round(row["cell"].x, 9), round(row["cell"].y, 9)),
+            "location_type": row["location_type"],
+            "count": row["count"],
+            "lon": row["avg_lon"],
+            "lat": row["avg_lat"],
+        }
+        for row in rows
+    ]
+
+
+def get_tile_clusters(queryset, zoom, x, y, location_type=None):
+    """(etag, rows) of one tile, cached per tenant, data version and type filter."""
+    return get_or_create_tile(
+        "clusters",
+        zoom,
+        x,
+        y,
+        lambda: cluster_tile(queryset, zoom, x, y),
+        variant=location_type,
+        encode=lambda rows: json.dumps(rows, sort_keys=True).encode(),
+    )
+
+
+def merge_clusters(rows):
+    """
+    Merge per-type cell aggregates (possibly from several tiles) into clusters
+    with a count, a count-weighted centroid and the dominant location type.
+    """
+    cells = {}
+    for row in rows:
+        cell = cells.setdefault(
+            tuple(row["cell"]), {"count": 0, "lon": 0.0, "lat": 0.0, "types": {}}
+        )
+        cell["count"] += row["count"]
+        cell["lon"] += row["lon"] * row["count"]
+        cell["lat"] += row["lat"] * row["count"]
+        types = cell["types"]
+        types[row["location_type"]] = types.get(row["location_type"], 0) + row["count"]
+
+    clusters = []
+    for cell in cells.values():
+        count = cell["count"]
+        clusters.append(
+            {
+                "count": count,
+                "lon": cell["lon"] / count,
+                "lat": cell["lat"] / count,
+                "location_type": max(cell["types"].items(), key=lambda t: t[1])[0],
+            }
+        )
+    return clusters
+
+
+def get_clusters(queryset, bbox, zoom, location_type=None):
+    """
+    (etag, clusters) for a bbox at a zoom level. Zoom levels past
+    MAX_TILE_ZOOM reuse its tiles: their cells are centimetres wide.
+    """
+    zoom = min(zoom, MAX_TILE_ZOOM)
+    rows = []
+    etags = []
+    for x, y in tiles_for_bbox(bbox, zoom):
+        etag, tile_rows = get_tile_clusters(queryset, zoom, x, y, location_type)
+        etags.append(etag)
+        rows.extend(tile_rows)
+    etag = hashlib.md5(":".join(etags).encode()).hexdigest()
+    return etag, merge_clusters(rows)
@@ -0,0 +1,64 @@
+"""
+Columnar location payloads for map and mobile clients.
+
+Instead of one object per feature, locations are returned as parallel
+arrays (ids, longitudes, latitudes, location type ids) so clients can
+decode points without per-feature overhead. Coordinates are read as
+floats in SQL, without hydrating geometries.
+
+The binary layout (little-endian) is:
+
+    magic      4 bytes  b"GMLC"
+    version    uint32   1
+    count      uint32   N
+    ids        N x uint32
+    lon        N x float32
+    lat        N x float32
+    types      N x uint32   (0 when the location has no type)
+"""
+
+import struct
+import sys
+from array import array
+
+from .filters import MAX_PRECISION
+from .functions import X, Y
+
+COLUMNS_MAGIC = b"GMLC"
+COLUMNS_VERSION = 1
+
+
+def location_columns(queryset, precision=MAX_PRECISION):
+    """Return the parallel arrays for the points of `queryset`."""
+    rows = queryset.annotate(lon=X("point"), lat=Y("point")).values_list(
+        "id", "lon", "lat", "location_type_id"
+    )
+    columns = {"ids": [], "lon": [], "lat": [], "location_type": []}
+    for pk, lon, lat, location_type in rows:
+        columns["ids"].append(pk)
+        columns["lon"].append(round(lon, precision))
+        columns["lat"].append(round(lat, precision))
+        columns["location_type"].append(location_type)
+    columns["count"] = len(columns["ids"])
+    return columns
+
+
+def _pack(typecode, values):
+    packed = array(typecode, values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def encode_columns(columns):
+    """Encode location columns in the binary layout described above."""
+    return b"".join(
+        [
+            COLUMNS_MAGIC,
+            struct.pack("<II", COLUMNS_VERSION, columns["count"]),
+            _pack("I", columns["ids"]),
+            _pack("f", columns["lon"]),
+            _pack("f", columns["lat"]),
+            _pack("I", [pk or 0 for pk in columns["location_type"]]),
+        ]
+    )
@@ -0,0 +1,204 @@
+"""
+Live location updates for open maps, as server-sent events.
+
+Location changes are published on commit to the Redis pub/sub channel of
+the tenant, from whichever process made them. Each ASGI worker process holds
+one Redis subscription (EventRelay), subscribed to the channels of the
+tenants that have open maps, and fans the messages out to those SSE streams,
+so every node sees every change without polling the API.
+
+Open streams are capped per process (GEOMAP_EVENTS_MAX_STREAMS) and per user
+(GEOMAP_EVENTS_MAX_STREAMS_PER_USER); beyond that the map works without live
+updates.
+
+Events are JSON objects with an `action`:
+- "created" / "updated": `id` and the GeoJSON `feature` of the location;
+- "deleted": `id` (also sent when a location is deactivated);
+- "reload": many locations changed at once (bulk upsert, import).
+
+Live updates need settings.GEOMAP_EVENTS_REDIS_URL and an ASGI server;
+otherwise the stream answers 204, which tells EventSource to stop.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.tenant_utils import get_schema_name
+
+from .serializers import LocationSerializer
+
+logger = logging.getLogger(__name__)
+
+# EventSource reconnection delay after a dropped stream
+RETRY_MILLISECONDS = 3000
+# Messages buffered per stream; a client slower than that misses events
+STREAM_QUEUE_SIZE = 100
+
+_redis_client = None
+
+
+def get_redis_url():
+    return getattr(settings, "GEOMAP_EVENTS_REDIS_URL", "")
+
+
+def channel_name(schema_name):
+    return f"geomap:events:{schema_name}"
+
+
+def get_redis_client():
+    """Shared synchronous Redis client for publishing, or None."""
+    global _redis_client
+    if _redis_client is None and get_redis_url():
+        _redis_client = redis.Redis.from_url(get_redis_url())
+    return _redis_client
+
+
+def encode_event(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":"))
+
+
+def publish_event(payload, schema_name=None):
+    """Publish an event to the current tenant's channel; never raises."""
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        client.publish(
+            channel_name(schema_name or get_schema_name()), encode_event(payload)
+        )
+    except Exception as e:
+        logger.warning(f"Could not publish geomap event: {e}")
+
+
+def location_event(location, action):
+    """Event payload for a "created", "updated" or "deleted" location."""
+    if action == "deleted" or not location.is_active:
+        return {"action": "deleted", "id": location.pk}
+    return {
+        "action": action,
+        "id": location.pk,
+        "feature": LocationSerializer(location).data,
+    }
+
+
+def publish_location_event(location, action):
+    publish_event(location_event(location, action))
+
+
+def publish_reload():
+    publish_event({"action": "reload"})
+
+
+class EventRelay:
+    """
+    One Redis subscription per process, shared by all open streams. A
+    channel is subscribed while at least one stream of its tenant is open.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.client = None
+        self.pubsub = None
+        self.reader = None
+        self.queues = defaultdict(set)
+        self.users = defaultdict(int)
+
+    def _bind(self):
+        # Async Redis connections belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.client = redis.asyncio.Redis.from_url(get_redis_url())
+            self.pubsub = self.client.pubsub()
+            self.reader = None
+            self.queues.clear()
+            self.users.clear()
+
+    def stream_count(self):
+        return sum(len(queues) for queues in self.queues.values())
+
+    def can_open(self, user_key):
+        """Whether another stream fits under the process and user caps."""
+        max_streams = getattr(settings, "GEOMAP_EVENTS_MAX_STREAMS", 1000)
+        max_per_user = getattr(settings, "GEOMAP_EVENTS_MAX_STREAMS_PER_USER", 5)
+        return (
+            self.stream_count() < max_streams
+            and self.users.get(user_key, 0) < max_per_user
+        )
+
+    async def open(self, schema_name, user_key):
+        self._bind()
+        channel = channel_name(schema_name)
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        if not self.queues[channel]:
+            await self.pubsub.subscribe(channel)
+        self.queues[channel].add(queue)
+        self.users[user_key] += 1
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.create_task(self._read())
+        return queue
+
+    async def close(self, schema_name, user_key, queue):
+        channel = channel_name(schema_name)
+        self.queues[channel].discard(queue)
+        self.users[user_key] -= 1
+        if self.users[user_key] <= 0:
+            del self.users[user_key]
+        if not self.queues[channel]:
+            del self.queues[channel]
+            try:
+                await self.pubsub.unsubscribe(channel)
+            except Exception as e:
+                logger.warning(f"Could not unsubscribe from {channel}: {e}")
+
+    async def _read(self):
+        while self.queues:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except Exception as e:
+                logger.warning(f"Geomap event subscription failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            channel, data = message["channel"], message["data"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            if isinstance(data, bytes):
+                data = data.decode()
+            for queue in self.queues.get(channel, ()):
+                if not queue.full():
+                    queue.put_nowait(data)
+
+
+relay = EventRelay()
+
+
+async def stream_events(schema_name, user_key, heartbeat=None):
+    """
+    Yield SSE frames for the tenant channel until the client disconnects,
+    with a comment line every `heartbeat` seconds to keep proxies open.
+    Callers check `relay.can_open(user_key)` first.
+    """
+    heartbeat = heartbeat or getattr(settings, "GEOMAP_EVENTS_HEARTBEAT", 15)
+    queue = await relay.open(schema_name, user_key)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"event: location\ndata: {data}\n\n"
+    finally:
+        await relay.close(schema_name, user_key, queue)
@@ -0,0 +1,160 @@
+import django_filters
+from django.contrib.gis.geos import Point, Polygon
+from rest_framework.exceptions import ParseError
+
+from .functions import DWithin, GeoDistance, KNNDistance, geography, point_value
+from .models import Location
+from .search import search_locations
+
+# Marker radius (in pixels) used to pad viewport queries so that markers
+# straddling the edge of the map are still returned.
+MARKER_BUFFER_PIXELS = 16
+MAX_ZOOM = 24
+MAX_RADIUS_METERS = 100_000
+MAX_NEAREST = 100
+DEFAULT_NEAREST = 10
+MAX_QUERY_LENGTH = 200
+# 6 decimals is ~0.1 m, well beyond what a map marker needs
+MAX_PRECISION = 6
+
+
+def parse_bbox(value, param="bbox"):
+    """Parse a 'minx,miny,maxx,maxy' string into a tuple of floats."""
+    try:
+        minx, miny, maxx, maxy = (float(n) for n in value.split(","))
+    except (AttributeError, ValueError):
+        raise ParseError(f"Invalid {param}, expected minx,miny,maxx,maxy.")
+    if minx > maxx or miny > maxy:
+        raise ParseError(f"Invalid {param}, min values exceed max values.")
+    return minx, miny, maxx, maxy
+
+
+def parse_point(value, param):
+    """Parse a 'lon,lat' string into a SRID 4326 point."""
+    try:
+        lon, lat = (float(n) for n in value.split(","))
+    except (AttributeError, ValueError):
+        raise ParseError(f"Invalid {param}, expected lon,lat.")
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ParseError(f"Invalid {param}, coordinates out of range.")
+    return Point(lon, lat, srid=4326)
+
+
+def parse_bounded_number(value, param, maximum, cast=float):
+    """Parse a positive number no larger than `maximum`."""
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise ParseError(f"Invalid {param}, expected a number.")
+    if not 0 < number <= maximum:
+        raise ParseError(f"Invalid {param}, expected a value up to {maximum}.")
+    return number
+
+
+def parse_zoom(value, param="zoom"):
+    """Parse a web map zoom level."""
+    try:
+        zoom = int(value)
+    except (TypeError, ValueError):
+        raise ParseError(f"Invalid {param}, expected an integer.")
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ParseError(f"Invalid {param}, expected 0 to {MAX_ZOOM}.")
+    return zoom
+
+
+def parse_precision(value, default=MAX_PRECISION, param="precision"):
+    """Parse a number of coordinate decimals."""
+    if value in (None, ""):
+        return default
+    try:
+        precision = int(value)
+    except (TypeError, ValueError):
+        raise ParseError(f"Invalid {param}, expected an integer.")
+    if not 0 <= precision <= MAX_PRECISION:
+        raise ParseError(f"Invalid {param}, expected 0 to {MAX_PRECISION}.")
+    return precision
+
+
+def degrees_per_pixel(zoom):
+    """Approximate longitude span of one 256px-tile pixel at a zoom level."""
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def bbox_polygon(bbox, zoom=None):
+    """
+    Build the SRID 4326 envelope for a bbox, padded by the marker radius
+    when the zoom level is known.
+    """
+    minx, miny, maxx, maxy = bbox
+    if zoom is not None:
+        pad = MARKER_BUFFER_PIXELS * degrees_per_pixel(zoom)
+        minx, miny, maxx, maxy = minx - pad, miny - pad, maxx + pad, maxy + pad
+    polygon = Polygon.from_bbox(
+        (max(minx, -180.0), max(miny, -90.0), min(maxx, 180.0), min(maxy, 90.0))
+    )
+    polygon.srid = 4326
+    return polygon
+
+
+class LocationFilter(django_filters.FilterSet):
+    """
+    Filters for the locations API.
+    `bbox=minx,miny,maxx,maxy` (lon/lat) restricts results to a viewport with
+    an index-backed `point && envelope` query; `zoom` pads it by the marker size.
+    `near=lon,lat&radius=meters` and `nearest=lon,lat&k=N` run radius and KNN
+    searches on the geography index and annotate `distance` in meters.
+    `q` is a ranked full-text and fuzzy name search (annotates `search_rank`).
+    """
+
+    q = django_filters.CharFilter(method="filter_q")
+    bbox = django_filters.CharFilter(method="filter_bbox")
+    zoom = django_filters.NumberFilter(method="filter_noop")
+    near = django_filters.CharFilter(method="filter_near")
+    radius = django_filters.NumberFilter(method="filter_noop")
+    nearest = django_filters.CharFilter(method="filter_nearest")
+    k = django_filters.NumberFilter(method="filter_noop")
+
+    class Meta:
+        model = Location
+        fields = ["location_type", "canton", "is_active"]
+
+    def filter_noop(self, queryset, name, value):
+        return queryset
+
+    def filter_q(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        if len(value) > MAX_QUERY_LENGTH:
+            raise ParseError(f"Invalid q, expected up to {MAX_QUERY_LENGTH} characters.")
+        return search_locations(queryset, value)
+
+    def filter_bbox(self, queryset, name, value):
+        zoom = self.data.get("zoom")
+        polygon = bbox_polygon(
+            parse_bbox(value),
+            parse_zoom(zoom) if zoom not in (None, "") else None,
+        )
+        return queryset.filter(point__bboverlaps=polygon)
+
+    def filter_near(self, queryset, name, value):
+        point = point_value(parse_point(value, "near"))
+        radius = parse_bounded_number(
+            self.data.get("radius"), "radius", MAX_RADIUS_METERS
+        )
+        return (
+            queryset.filter(DWithin(geography("point"), point, radius))
+            .annotate(distance=GeoDistance(geography("point"), point))
+            .order_by("distance")
+        )
+
+    def filter_nearest(self, queryset, name, value):
+        point = point_value(parse_point(value, "nearest"))
+        k = parse_bounded_number(
+            self.data.get("k", DEFAULT_NEAREST), "k", MAX_NEAREST, cast=int
+        )
+        return (
+            queryset.filter(point__isnull=False)
+            .annotate(distance=KNNDistance(geography("point"), point))
+            .order_by("distance")[:k]
+        )
@@ -0,0 +1,63 @@
+from django.contrib.gis.db import models
+from django.contrib.gis.db.models.functions import GeoFunc
+from django.db.models import BigIntegerField, BooleanField, FloatField, Func, Value
+from django.db.models.functions import Cast
+
+
+def geography(expression):
+    """Cast a SRID 4326 point expression to geography (distances in meters)."""
+    return Cast(expression, models.PointField(geography=True, srid=4326))
+
+
+def point_value(point):
+    """Wrap a GEOS point as a SRID 4326 geography query parameter."""
+    return geography(Value(point, output_field=models.PointField(srid=4326)))
+
+
+class DWithin(Func):
+    """ST_DWithin(a, b, distance); index-backed when `a` is indexed."""
+
+    function = "ST_DWithin"
+    output_field = BooleanField()
+
+
+class GeoDistance(Func):
+    """ST_Distance(a, b); meters when both arguments are geography."""
+
+    function = "ST_Distance"
+    output_field = FloatField()
+
+
+class KNNDistance(Func):
+    """The `a <-> b` operator, usable for index-ordered KNN scans."""
+
+    arg_joiner = " <-> "
+    template = "%(expressions)s"
+    output_field = FloatField()
+
+
+class CurrentTransactionId(Func):
+    """pg_current_xact_id() as a bigint: the id of the writing transaction."""
+
+    template = "pg_current_xact_id()::text::bigint"
+    output_field = BigIntegerField()
+
+
+class X(Func):
+    """ST_X(point)."""
+
+    function = "ST_X"
+    output_field = FloatField()
+
+
+class Y(Func):
+    """ST_Y(point)."""
+
+    function = "ST_Y"
+    output_field = FloatField()
+
+
+class SimplifyPreserveTopology(GeoFunc):
+    """ST_SimplifyPreserveTopology(geometry, tolerance)."""
+
+    function = "ST_SimplifyPreserveTopology"
@@ -0,0 +1,64 @@
+"""
+Pluggable gazetteers used to geocode imported locations without coordinates.
+
+settings.GEOMAP_GAZETTEER is the dotted path of a Gazetteer subclass. The
+bundled CSVGazetteer resolves Swiss addresses by zip code and city from a
+local CSV file (columns zip_code, city, longitude, latitude), so imports
+never call out to an external service.
+"""
+
+import csv
+import logging
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Gazetteer:
+    """Base gazetteer. Subclasses implement `geocode`."""
+
+    def geocode(self, record):
+        """Return (lon, lat) in SRID 4326 for an import record, or None."""
+        raise NotImplementedError
+
+    def geocode_many(self, records):
+        """Geocode a batch of records, returning a list aligned with it."""
+        return [self.geocode(record) for record in records]
+
+
+class CSVGazetteer(Gazetteer):
+    """Looks up zip code + city (or zip code alone) in a local CSV file."""
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, "GEOMAP_GAZETTEER_FILE", "")
+        self._index = None
+
+    def _load(self):
+        index = {}
+        if not self.path:
+            logger.warning("GEOMAP_GAZETTEER_FILE is not set, geocoding disabled.")
+            return index
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                position = (float(row["longitude"]), float(row["latitude"]))
+                zip_code = row["zip_code"].strip()
+                index[(zip_code, row["city"].strip().lower())] = position
+                index.setdefault((zip_code, ""), position)
+        return index
+
+    def geocode(self, record):
+        if self._index is None:
+            self._index = self._load()
+        zip_code = (record.get("zip_code") or "").strip()
+        city = (record.get("city") or "").strip().lower()
+        return self._index.get((zip_code, city)) or self._index.get((zip_code, ""))
+
+
+def get_gazetteer():
+    """Instantiate the configured gazetteer."""
+    path = getattr(
+        settings, "GEOMAP_GAZETTEER", "tenant_apps.geomap.gazetteer.CSVGazetteer"
+    )
+    return import_string(path)()
@@ -0,0 +1,91 @@
+"""
+Database-side GeoJSON generation for locations.
+
+PostgreSQL builds the whole FeatureCollection with json_build_object,
+ST_AsGeoJSON and json_agg over the SQL of the filtered queryset, and the
+view returns the resulting text as-is: no model instances are created and
+no DRF field serialization runs. Properties mirror LocationSerializer,
+except `image`, which is the MEDIA_URL-prefixed path rather than an
+absolute URL.
+"""
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+
+LOCATION_COLUMNS = [
+    "id",
+    "name",
+    "description",
+    "location_type",
+    "location_type_name",
+    "point",
+    "street",
+    "street_number",
+    "zip_code",
+    "city",
+    "canton",
+    "is_active",
+    "image",
+    "website",
+    "phone",
+    "email",
+    "external_id",
+    "created_at",
+    "updated_at",
+]
+
+FEATURE_COLLECTION_SQL = """
+    SELECT json_build_object(
+        'type', 'FeatureCollection',
+        'features', COALESCE(json_agg(json_build_object(
+            'id', f.id,
+            'type', 'Feature',
+            'geometry', ST_AsGeoJSON(f.point)::json,
+            'properties', json_build_object(
+                'name', f.name,
+                'description', f.description,
+                'location_type', f.location_type_id,
+                'location_type_name', COALESCE(f.location_type_name, ''),
+                'latitude', ST_Y(f.point),
+                'longitude', ST_X(f.point),
+                'street', f.street,
+                'street_number', f.street_number,
+                'zip_code', f.zip_code,
+                'city', f.city,
+                'canton', f.canton,
+                'is_active', f.is_active,
+                'image', CASE WHEN f.image <> '' THEN %s || f.image END,
+                'website', f.website,
+                'phone', f.phone,
+                'email', f.email,
+                'external_id', f.external_id,
+                'created_at', f.created_at,
+                'updated_at', f.updated_at,
+                'distance', {distance}
+            )
+        )), '[]'::json)
+    )::text
+    FROM ({inner}) f
+"""
+
+
+def db_feature_collection(queryset):
+    """Return the FeatureCollection for `queryset` as UTF-8 bytes."""
+    columns = list(LOCATION_COLUMNS)
+    has_distance = "distance" in queryset.query.annotations
+    if has_distance:
+        columns.append("distance")
+
+    inner = queryset.annotate(location_type_name=F("location_type__name")).values(
+        *columns
+    )
+    inner_sql, inner_params = inner.query.sql_with_params()
+    sql = FEATURE_COLLECTION_SQL.format(
+        inner=inner_sql,
+        distance="f.distance" if has_distance else "NULL",
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [settings.MEDIA_URL, *inner_params])
+        row = cursor.fetchone()
+    return row[0].encode()
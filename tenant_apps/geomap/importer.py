@@ -0,0 +1,436 @@
+"""
+Import pipeline for large location files.
+
+Features are stream-parsed (GeoJSON, Shapefile, GeoPackage, ... through
+GDAL/OGR; CSV with the csv module) and loaded in batches:
+
+1. records are mapped onto Location fields and, when enabled, missing
+   positions are filled from the configured gazetteer;
+2. the batch is loaded with COPY into a temporary staging table, with
+   geometries as EWKT in their source SRID;
+3. one set-based INSERT ... ON CONFLICT (external_id) DO UPDATE merges the
+   staging table into Location, reprojecting the whole batch to SRID 4326
+   with ST_Transform.
+
+Each batch runs in its own transaction, so memory and lock time stay
+bounded whatever the size of the file.
+
+Only rows with an external_id are merged into existing locations. Rows
+without one are always inserted as new locations, so importing the same
+file twice duplicates them: files meant to be re-imported need an id column.
+
+Files uploaded in the admin are queued as LocationImport jobs and run
+outside the web workers by the run_location_imports command, which records
+each job's status and result.
+"""
+
+import contextlib
+import csv
+import io
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import bump_data_version
+from .events import publish_reload
+from .gazetteer import get_gazetteer
+from .models import Location, LocationImport, LocationType
+from .response_cache import bump_model_version
+from .search import update_search_vectors
+from .stats import rebuild_statistics
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "geomap_location_import"
+IMPORT_FIELDS = [
+    "external_id",
+    "name",
+    "description",
+    "location_type",
+    "street",
+    "street_number",
+    "zip_code",
+    "city",
+    "canton",
+    "is_active",
+    "website",
+    "phone",
+    "email",
+]
+# Source attribute names recognised for each field (case-insensitive)
+FIELD_ALIASES = {
+    "external_id": ["external_id", "id", "fid", "uid", "ref"],
+    "name": ["name", "title", "label"],
+    "location_type": ["location_type", "type", "category"],
+    "zip_code": ["zip_code", "zip", "postcode", "plz", "npa"],
+    "city": ["city", "town", "locality", "ort"],
+    "street_number": ["street_number", "housenumber", "number"],
+}
+LON_COLUMNS = ("longitude", "lon", "lng", "x")
+LAT_COLUMNS = ("latitude", "lat", "y")
+WKT_COLUMNS = ("wkt", "geometry", "geom")
+TRUE_VALUES = {"1", "true", "t", "yes", "y", "oui", "ja"}
+
+
+@dataclass
+class ImportResult:
+    read: int = 0
+    merged: int = 0
+    skipped: int = 0
+    geocoded: int = 0
+    errors: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            "read": self.read,
+            "merged": self.merged,
+            "skipped": self.skipped,
+            "geocoded": self.geocoded,
+            "errors": self.errors[:100],
+        }
+
+
+# ==========================================
+# READERS
+# ==========================================
+
+
+def build_field_map(source_fields, mapping=None):
+    """Map Location fields to source attribute names."""
+    lookup = {name.lower(): name for name in source_fields}
+    field_map = {}
+    for target in IMPORT_FIELDS:
+        if mapping and target in mapping:
+            field_map[target] = mapping[target]
+            continue
+        for alias in FIELD_ALIASES.get(target, [target]):
+            if alias in lookup:
+                field_map[target] = lookup[alias]
+                break
+    return field_map
+
+
+def iter_csv_features(path, mapping=None, srid=None):
+    """Yield (record, ewkt) from a CSV file with lon/lat or WKT columns."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        columns = {name.lower(): name for name in reader.fieldnames or []}
+        field_map = build_field_map(reader.fieldnames or [], mapping)
+        lon = next((columns[c] for c in LON_COLUMNS if c in columns), None)
+        lat = next((columns[c] for c in LAT_COLUMNS if c in columns), None)
+        wkt = next((columns[c] for c in WKT_COLUMNS if c in columns), None)
+        srid = srid or 4326
+
+        for row in reader:
+            record = {target: row.get(source) for target, source in field_map.items()}
+            ewkt = None
+            if wkt and row.get(wkt):
+                ewkt = f"SRID={srid};{row[wkt]}"
+            elif lon and lat and row.get(lon) and row.get(lat):
+                try:
+                    ewkt = f"SRID={srid};POINT({float(row[lon])} {float(row[lat])})"
+                except ValueError:
+                    ewkt = None
+            yield record, ewkt
+
+
+def iter_ogr_features(path, layer=None, mapping=None, srid=None):
+    """Yield (record, ewkt) from any OGR-readable vector file."""
+    from django.contrib.gis.gdal import DataSource
+
+    source = DataSource(path)
+    ogr_layer = source[layer if layer is not None else 0]
+    field_map = build_field_map(ogr_layer.fields, mapping)
+    if srid is None and ogr_layer.srs is not None:
+        try:
+            ogr_layer.srs.identify_epsg()
+        except Exception:
+            pass
+        srid = ogr_layer.srs.srid
+    srid = srid or 4326
+
+    for feature in ogr_layer:
+        record = {}
+        for target, source_name in field_map.items():
+            value = feature.get(source_name)
+            record[target] = None if value is None else str(value)
+        geometry = feature.geom
+        ewkt = f"SRID={srid};{geometry.wkt}" if geometry is not None else None
+        yield record, ewkt
+
+
+def iter_source_features(path, layer=None, mapping=None, srid=None):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".csv", ".txt"):
+        return iter_csv_features(path, mapping, srid)
+    if extension == ".zip":
+        # Zipped shapefiles (.shp + .dbf + .prj ...)
+        path = f"/vsizip/{path}"
+    return iter_ogr_features(path, layer, mapping, srid)
+
+
+# ==========================================
+# STAGING AND MERGE
+# ==========================================
+
+STAGING_COLUMNS = ["row_number", *IMPORT_FIELDS, "geom"]
+STAGING_TYPES = {"row_number": "bigint", "is_active": "boolean"}
+
+
+def _create_staging_table(cursor):
+    columns = ", ".join(
+        f"{name} {STAGING_TYPES.get(name, 'text')}" for name in STAGING_COLUMNS
+    )
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ({columns}) "
+        "ON COMMIT DELETE ROWS"
+    )
+    # A batch run inside an outer transaction would still see earlier rows
+    cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+
+
+def _copy_rows(cursor, rows):
+    """COPY rows (lists aligned with STAGING_COLUMNS) into the staging table."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    sql = (
+        f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+    raw_cursor = cursor.cursor
+    if hasattr(raw_cursor, "copy_expert"):
+        buffer.seek(0)
+        raw_cursor.copy_expert(sql, buffer)
+    else:
+        with raw_cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+def _text_column(name):
+    """Staging expression for a text field, trimmed to the model's max_length."""
+    max_length = Location._meta.get_field(name).max_length
+    expression = f"COALESCE(s.{name}, '')"
+    return f"LEFT({expression}, {max_length})" if max_length else expression
+
+
+def _merge_sql():
+    text_fields = [
+        name for name in IMPORT_FIELDS if name not in ("location_type", "is_active")
+    ]
+    target = [
+        *text_fields,
+        "location_type_id",
+        "is_active",
+        "point",
+        "search_vector",
+        "created_at",
+        "updated_at",
+        "created_xid",
+        "change_xid",
+    ]
+    select = [
+        *(
+            "NULLIF(s.external_id, '')" if name == "external_id" else _text_column(name)
+            for name in text_fields
+        ),
+        "t.id",
+        "COALESCE(s.is_active, true)",
+        "ST_Force2D(ST_PointOnSurface(ST_Transform(ST_GeomFromEWKT(s.geom), 4326)))",
+        "NULL",
+        "now()",
+        "now()",
+        "pg_current_xact_id()::text::bigint",
+        "pg_current_xact_id()::text::bigint",
+    ]
+    update = ", ".join(
+        f"{name} = EXCLUDED.{name}"
+        for name in target
+        if name not in ("created_at", "created_xid")
+    )
+    return f"""
+        INSERT INTO {Location._meta.db_table} ({', '.join(target)})
+        SELECT DISTINCT ON (COALESCE(NULLIF(s.external_id, ''), 'row:' || s.row_number))
+            {', '.join(select)}
+        FROM {STAGING_TABLE} s
+        LEFT JOIN {LocationType._meta.db_table} t ON t.name = s.location_type
+        WHERE COALESCE(s.name, '') <> ''
+        ORDER BY COALESCE(NULLIF(s.external_id, ''), 'row:' || s.row_number),
+            s.row_number DESC
+        ON CONFLICT (external_id) DO UPDATE SET {update}
+        RETURNING id
+    """
+
+
+def _ensure_location_types(names):
+    """Create the location types referenced by a batch that do not exist yet."""
+    names = {name for name in names if name}
+    existing = set(
+        LocationType.objects.filter(name__in=names).values_list("name", flat=True)
+    )
+    for name in names - existing:
+        LocationType.objects.create(name=name[:100])
+
+
+def _staging_row(row_number, record, ewkt):
+    values = [row_number]
+    for name in IMPORT_FIELDS:
+        value = record.get(name)
+        if name == "is_active" and value not in (None, ""):
+            value = "t" if str(value).strip().lower() in TRUE_VALUES else "f"
+        values.append(value)
+    values.append(ewkt)
+    return values
+
+
+def import_batch(batch, result, gazetteer=None):
+    """Geocode, stage and merge one batch of (row_number, record, ewkt)."""
+    if gazetteer is not None:
+        missing = [i for i, (_, _, ewkt) in enumerate(batch) if not ewkt]
+        positions = gazetteer.geocode_many([batch[i][1] for i in missing])
+        for i, position in zip(missing, positions):
+            if position:
+                row_number, record, _ = batch[i]
+                lon, lat = position
+                batch[i] = (row_number, record, f"SRID=4326;POINT({lon} {lat})")
+                result.geocoded += 1
+
+    rows = []
+    for row_number, record, ewkt in batch:
+        if not (record.get("name") or "").strip():
+            result.skipped += 1
+            continue
+        rows.append(_staging_row(row_number, record, ewkt))
+    if not rows:
+        return
+
+    type_column = STAGING_COLUMNS.index("location_type")
+    with transaction.atomic():
+        _ensure_location_types(row[type_column] for row in rows)
+        with connection.cursor() as cursor:
+            _create_staging_table(cursor)
+            _copy_rows(cursor, rows)
+            cursor.execute(_merge_sql())
+            merged_ids = [row[0] for row in cursor.fetchall()]
+        result.merged += len(merged_ids)
+        update_search_vectors(Location.objects.filter(pk__in=merged_ids))
+
+
+def import_locations(
+    path, layer=None, mapping=None, srid=None, geocode=False, batch_size=None
+):
+    """
+    Import a location file into the current tenant schema. Rows without an
+    external_id are inserted on every import (see the module docstring).
+    """
+    batch_size = batch_size or getattr(settings, "GEOMAP_IMPORT_BATCH_SIZE", 5000)
+    gazetteer = get_gazetteer() if geocode else None
+    result = ImportResult()
+    features = enumerate(iter_source_features(path, layer, mapping, srid), start=1)
+
+    while batch := [
+        (row_number, record, ewkt)
+        for row_number, (record, ewkt) in islice(features, batch_size)
+    ]:
+        result.read += len(batch)
+        first_row = batch[0][0]
+        try:
+            import_batch(batch, result, gazetteer)
+        except Exception as e:
+            logger.warning(f"Location import batch at row {first_row} failed: {e}")
+            result.errors.append({"row": first_row, "error": str(e)})
+            result.skipped += len(batch)
+
+    if result.merged:
+        bump_data_version()
+        bump_model_version(Location)
+        rebuild_statistics()
+        publish_reload()
+    return result
+
+
+def claim_pending_import():
+    """
+    Mark the oldest pending import as running and return it, or None.
+    Concurrent runners skip the jobs locked by each other.
+    """
+    with transaction.atomic():
+        job = (
+            LocationImport.objects.select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("created_at")
+            .first()
+        )
+        if job is not None:
+            job.status = "running"
+            job.started_at = timezone.now()
+            job.save(update_fields=["status", "started_at", "updated_at"])
+    return job
+
+
+def fail_interrupted_imports():
+    """
+    Mark imports running for longer than GEOMAP_IMPORT_TIMEOUT seconds as
+    failed: their runner was killed. Batches merged before are kept.
+    """
+    timeout = getattr(settings, "GEOMAP_IMPORT_TIMEOUT", 6 * 3600)
+    return LocationImport.objects.filter(
+        status="running", started_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(
+        status="failed",
+        error="Interrupted: the import runner stopped before finishing.",
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def run_import(job):
+    """Run a claimed import job and record its outcome."""
+    from tenant_apps.users.models import UserActivity
+
+    suffix = os.path.splitext(job.original_name)[1].lower()
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as local:
+        path = local.name
+    try:
+        # GDAL needs a local file; the upload may live in remote storage
+        with job.file.open("rb") as source, open(path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        result = import_locations(path, **job.options)
+    except Exception as e:
+        logger.exception(f"Location import {job.pk} failed")
+        job.status = "failed"
+        job.error = str(e)
+    else:
+        job.status = "done"
+        job.result = result.as_dict()
+        job.file.delete(save=False)
+        if job.created_by is not None:
+            UserActivity.log(
+                job.created_by,
+                "action",
+                description="Location import",
+                file=job.original_name,
+                **job.result,
+            )
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(path)
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def run_pending_imports():
+    """Run the pending imports of the current tenant; return the jobs run."""
+    fail_interrupted_imports()
+    jobs = []
+    while (job := claim_pending_import()) is not None:
+        jobs.append(run_import(job))
+    return jobs
@@ -0,0 +1,193 @@
+"""
+Management command comparing concurrent request handling per worker under
+ASGI and WSGI.
+
+Starts one single-worker server per mode on localhost:
+- wsgi: gunicorn sync worker serving the DRF locations API;
+- asgi: gunicorn with a uvicorn worker serving the async locations view;
+then fires batches of concurrent requests at each and reports throughput
+and latency per concurrency level. `--client-delay` makes every client
+pause between its request line and its headers, like a slow mobile
+client: a sync worker is blocked for that time, an async worker is not.
+
+The servers run with core.settings_benchmark (see --server-settings), which
+disables API throttling and the response cache: otherwise most requests
+would get 429 and the others would be cache hits. Non-200 responses are
+reported per status code.
+
+Usage:
+    python manage.py benchmark_asgi --host acme.localhost --token <key>
+    python manage.py benchmark_asgi --host acme.localhost --token <key> \\
+        --concurrency 10 50 200 --requests 400 --client-delay 0.5
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+SERVERS = {
+    "wsgi": {
+        "args": ["core.wsgi:application", "--worker-class", "sync"],
+        "path": "/geomap/api/locations/?page_size=100",
+    },
+    "asgi": {
+        "args": [
+            "core.asgi:application",
+            "--worker-class",
+            "uvicorn_worker.UvicornWorker",
+        ],
+        "path": "/geomap/async/locations/?page_size=100",
+    },
+}
+STARTUP_TIMEOUT = 30
+
+
+def wait_for_port(port, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+async def timed_request(port, host, path, token, client_delay):
+    """Send one GET and read the whole response; return (status, seconds)."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\n".encode())
+        await writer.drain()
+        if client_delay:
+            await asyncio.sleep(client_delay)
+        headers = [f"Host: {host}", "Connection: close", "Accept: application/json"]
+        if token:
+            headers.append(f"Authorization: Token {token}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    parts = status_line.split()
+    status = int(parts[1]) if len(parts) > 1 else 0
+    return status, time.perf_counter() - start
+
+
+async def run_load(port, host, path, token, concurrency, total, client_delay):
+    """Run `total` requests with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            try:
+                return await timed_request(port, host, path, token, client_delay)
+            except OSError:
+                return None, 0.0
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(total)))
+    return results, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent requests per worker under ASGI and WSGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", required=True, help="Tenant domain name.")
+        parser.add_argument("--token", default="", help="API token of a user.")
+        parser.add_argument(
+            "--concurrency", nargs="+", type=int, default=[10, 50, 200]
+        )
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument(
+            "--client-delay",
+            type=float,
+            default=0.0,
+            help="Seconds each client waits between request line and headers.",
+        )
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--modes", nargs="+", choices=list(SERVERS), default=list(SERVERS)
+        )
+        parser.add_argument(
+            "--server-settings",
+            default="core.settings_benchmark",
+            help="Settings module of the benchmarked servers.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'mode':<5} {'conc':>5} {'req/s':>9} {'p50 ms':>9} "
+            f"{'p95 ms':>9}  other responses"
+        )
+        for offset, mode in enumerate(options["modes"]):
+            port = options["port"] + offset
+            server = self._start_server(mode, port, options["server_settings"])
+            try:
+                for concurrency in options["concurrency"]:
+                    self._report(mode, port, concurrency, options)
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+    def _start_server(self, mode, port, settings_module):
+        command = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            *SERVERS[mode]["args"],
+            "--workers",
+            "1",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--timeout",
+            "120",
+            "--log-level",
+            "warning",
+        ]
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+        server = subprocess.Popen(command, env=env)
+        if not wait_for_port(port):
+            server.terminate()
+            raise CommandError(f"The {mode} server did not start on port {port}.")
+        return server
+
+    def _report(self, mode, port, concurrency, options):
+        results, elapsed = asyncio.run(
+            run_load(
+                port,
+                options["host"],
+                SERVERS[mode]["path"],
+                options["token"],
+                concurrency,
+                options["requests"],
+                options["client_delay"],
+            )
+        )
+        timings = [seconds for status, seconds in results if status == 200]
+        others = Counter(
+            "connection" if status is None else status
+            for status, _ in results
+            if status != 200
+        )
+        p50 = p95 = 0.0
+        if len(timings) > 1:
+            p50 = statistics.median(timings) * 1000
+            p95 = statistics.quantiles(timings, n=20)[-1] * 1000
+        elif timings:
+            p50 = p95 = timings[0] * 1000
+        others = ", ".join(f"{status}: {count}" for status, count in others.items())
+        self.stdout.write(
+            f"{mode:<5} {concurrency:>5} {len(timings) / elapsed:>9.1f} "
+            f"{p50:>9.1f} {p95:>9.1f}  {others or '-'}"
+        )
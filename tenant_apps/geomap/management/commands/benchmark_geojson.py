@@ -0,0 +1,115 @@
+"""
+Management command comparing the GeoJSON output paths for locations.
+
+Inserts synthetic locations into a tenant schema inside a transaction,
+times LocationSerializer + JSONRenderer, the streaming encoder and the
+database-side json_agg path at each size, then rolls everything back.
+
+Usage:
+    python manage.py benchmark_geojson --schema tenant_acme
+    python manage.py benchmark_geojson --schema tenant_acme --sizes 1000 10000 --repeat 5
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+
+from public_apps.customers.models import Client
+from tenant_apps.geomap.geojson import db_feature_collection
+from tenant_apps.geomap.models import Location, LocationType
+from tenant_apps.geomap.serializers import LocationSerializer
+from tenant_apps.geomap.streaming import stream_feature_collection
+
+# Rough bounding box of Switzerland
+SWISS_BBOX = (5.96, 45.82, 10.49, 47.81)
+BENCHMARK_PREFIX = "benchmark-geojson-"
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark serializer, streaming and database-side GeoJSON generation."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schema", required=True, help="Tenant schema name.")
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[1000, 10000, 100000]
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        schema = options["schema"]
+        if not Client.objects.filter(schema_name=schema).exists():
+            raise CommandError(f"Tenant '{schema}' does not exist.")
+
+        connection.set_schema(schema)
+        try:
+            with transaction.atomic():
+                self._run(options["sizes"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Synthetic locations rolled back.")
+        finally:
+            connection.set_schema_to_public()
+
+    def _run(self, sizes, repeat):
+        self._create_locations(max(sizes))
+        base = (
+            Location.objects.filter(name__startswith=BENCHMARK_PREFIX)
+            .select_related("location_type")
+            .order_by("id")
+        )
+        paths = [
+            ("serializer", self._serializer),
+            ("streaming", self._streaming),
+            ("database", db_feature_collection),
+        ]
+
+        self.stdout.write(f"{'rows':>8}  {'path':<11} {'median':>9} {'size':>12}")
+        for size in sizes:
+            queryset = base[:size]
+            for name, build in paths:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    content = build(queryset)
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f"{size:>8}  {name:<11} {statistics.median(timings):>8.3f}s "
+                    f"{len(content):>11,}B"
+                )
+
+    def _serializer(self, queryset):
+        return JSONRenderer().render(LocationSerializer(queryset, many=True).data)
+
+    def _streaming(self, queryset):
+        return b"".join(stream_feature_collection(queryset))
+
+    def _create_locations(self, count):
+        self.stdout.write(f"Creating {count} synthetic locations...")
+        location_type = LocationType.objects.create(name=f"{BENCHMARK_PREFIX}type")
+        minx, miny, maxx, maxy = SWISS_BBOX
+        rng = random.Random(0)
+        Location.objects.bulk_create(
+            (
+                Location(
+                    name=f"{BENCHMARK_PREFIX}{i}",
+                    description="Synthetic benchmark location.",
+                    location_type=location_type,
+                    point=Point(
+                        rng.uniform(minx, maxx), rng.uniform(miny, maxy), srid=4326
+                    ),
+                    city="Bern",
+                    canton="BE",
+                )
+                for i in range(count)
+            ),
+            batch_size=5000,
+        )
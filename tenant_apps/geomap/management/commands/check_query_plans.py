@@ -0,0 +1,151 @@
+"""
+Management command asserting that the main geomap and users queries are
+served by their intended indexes.
+
+Runs EXPLAIN on each query in a tenant schema with sequential scans
+disabled (small schemas would otherwise always be scanned sequentially)
+and fails when none of the expected indexes appears in the plan. The test
+suite runs the same checks (tenant_apps/geomap/tests/test_query_plans.py);
+the command checks a real tenant after migrations.
+
+Usage:
+    python manage.py check_query_plans --schema tenant_acme
+"""
+
+import json
+from datetime import timedelta
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from public_apps.customers.models import Client
+from tenant_apps.geomap.filters import bbox_polygon
+from tenant_apps.geomap.functions import DWithin, geography, point_value
+from tenant_apps.geomap.models import Location
+from tenant_apps.users.models import CustomUser, UserActivity
+
+
+def plan_index_names(plan):
+    """Collect every index name used anywhere in an EXPLAIN JSON plan."""
+    names = set()
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            names.add(plan["Index Name"])
+        for value in plan.values():
+            names |= plan_index_names(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            names |= plan_index_names(item)
+    return names
+
+
+def get_plan_checks():
+    """(description, queryset, expected index names) for each checked query."""
+    active = Location.objects.filter(is_active=True)
+    bern = point_value(Point(7.4474, 46.948, srid=4326))
+    viewport = bbox_polygon((7.3, 46.9, 7.6, 47.0))
+    search = "bern"
+    return [
+        (
+            "locations API page",
+            active.order_by("name", "id")[:20],
+            {"geomap_location_active_name"},
+        ),
+        (
+            "locations by type",
+            active.filter(location_type_id=1).order_by("name")[:20],
+            {"geomap_location_act_type_name"},
+        ),
+        (
+            "viewport bbox",
+            active.filter(point__bboverlaps=viewport),
+            {"geomap_location_active_gist", "geomap_location_point_id"},
+        ),
+        (
+            "viewport summary",
+            active.filter(point__bboverlaps=viewport)
+            .order_by()
+            .values_list("canton", "location_type_id")
+            .annotate(count=Count("*")),
+            {"geomap_location_active_gist"},
+        ),
+        (
+            "change feed",
+            Location.objects.filter(change_xid__gt=0).order_by("change_xid", "id")[
+                :500
+            ],
+            {"geomap_location_change_idx"},
+        ),
+        (
+            "radius search",
+            active.filter(DWithin(geography("point"), bern, 1000)),
+            {"geomap_location_geog_gist"},
+        ),
+        (
+            "admin search",
+            Location.objects.filter(
+                Q(name__icontains=search)
+                | Q(description__icontains=search)
+                | Q(city__icontains=search)
+                | Q(street__icontains=search)
+            ),
+            {"geomap_location_search_trgm"},
+        ),
+        (
+            "recent user activity",
+            UserActivity.objects.filter(
+                created_at__gte=timezone.now() - timedelta(days=1)
+            ),
+            {"users_activity_created_brin"},
+        ),
+        (
+            "user list page",
+            CustomUser.objects.order_by("-date_joined", "-id")[:25],
+            {"users_date_joined_id_idx"},
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Check that geomap and users queries use their intended indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schema", required=True, help="Tenant schema name.")
+
+    def handle(self, *args, **options):
+        schema = options["schema"]
+        if not Client.objects.filter(schema_name=schema).exists():
+            raise CommandError(f"Tenant '{schema}' does not exist.")
+
+        connection.set_schema(schema)
+        try:
+            failures = self._check_plans()
+        finally:
+            connection.set_schema_to_public()
+
+        if failures:
+            raise CommandError(f"{failures} query plan(s) missed their index.")
+        self.stdout.write(self.style.SUCCESS("All query plans use their indexes."))
+
+    def _check_plans(self):
+        failures = 0
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            for description, queryset, expected in get_plan_checks():
+                plan = json.loads(queryset.explain(format="json"))
+                used = plan_index_names(plan)
+                if used & expected:
+                    self.stdout.write(f"  OK    {description}: {', '.join(sorted(used))}")
+                    continue
+                failures += 1
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"  FAIL  {description}: expected {', '.join(sorted(expected))}, "
+                        f"used {', '.join(sorted(used)) or 'no index'}"
+                    )
+                )
+        return failures
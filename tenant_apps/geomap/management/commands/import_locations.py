@@ -0,0 +1,81 @@
+"""
+Management command importing a location file into a tenant.
+
+Reads GeoJSON, Shapefile (plain or zipped), GeoPackage or any other
+OGR-readable file, or CSV with longitude/latitude or WKT columns, and
+upserts the features into Location by external_id in batches.
+
+Usage:
+    python manage.py import_locations shops.gpkg --schema tenant_acme
+    python manage.py import_locations shops.csv --schema tenant_acme --geocode
+    python manage.py import_locations data.shp --schema tenant_acme --srid 2056 \\
+        --map name=NOM --map external_id=OBJECTID
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from public_apps.customers.models import Client
+from tenant_apps.geomap.importer import import_locations
+
+
+class Command(BaseCommand):
+    help = "Import a GeoJSON/CSV/Shapefile/GeoPackage location file into a tenant."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import.")
+        parser.add_argument("--schema", required=True, help="Tenant schema name.")
+        parser.add_argument("--layer", help="Layer name or index (OGR sources).")
+        parser.add_argument("--srid", type=int, help="Source SRID if not detected.")
+        parser.add_argument(
+            "--map",
+            action="append",
+            default=[],
+            metavar="FIELD=SOURCE",
+            help="Map a Location field to a source attribute.",
+        )
+        parser.add_argument(
+            "--geocode",
+            action="store_true",
+            help="Geocode rows without coordinates with the configured gazetteer.",
+        )
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        try:
+            tenant = Client.objects.get(schema_name=options["schema"])
+        except Client.DoesNotExist:
+            raise CommandError(f"Tenant '{options['schema']}' does not exist.")
+
+        mapping = {}
+        for item in options["map"]:
+            target, sep, source = item.partition("=")
+            if not sep:
+                raise CommandError(f"Invalid --map '{item}', expected FIELD=SOURCE.")
+            mapping[target.strip()] = source.strip()
+
+        layer = options["layer"]
+        if layer is not None and layer.isdigit():
+            layer = int(layer)
+
+        connection.set_tenant(tenant)
+        try:
+            result = import_locations(
+                options["path"],
+                layer=layer,
+                mapping=mapping,
+                srid=options["srid"],
+                geocode=options["geocode"],
+                batch_size=options["batch_size"],
+            )
+        finally:
+            connection.set_schema_to_public()
+
+        for error in result.errors:
+            self.stderr.write(self.style.ERROR(f"  Row {error['row']}: {error['error']}"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Read {result.read}, merged {result.merged}, "
+                f"skipped {result.skipped}, geocoded {result.geocoded}."
+            )
+        )
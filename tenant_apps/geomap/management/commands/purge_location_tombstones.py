@@ -0,0 +1,44 @@
+"""
+Management command dropping expired location tombstones.
+
+Tombstones let the change feed report deletions; they are kept for
+GEOMAP_TOMBSTONE_RETENTION_DAYS, after which cursors have expired anyway.
+Run it from a scheduler (cron, a Render cron job), e.g. daily.
+
+Usage:
+    python manage.py purge_location_tombstones --all
+    python manage.py purge_location_tombstones --schema tenant_acme
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+
+from public_apps.customers.models import Client
+from tenant_apps.geomap.changes import purge_expired_tombstones
+
+
+class Command(BaseCommand):
+    help = "Drop the location tombstones older than the retention."
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--schema", help="Tenant schema name.")
+        group.add_argument("--all", action="store_true", help="All tenants.")
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if not options["all"]:
+            tenants = tenants.filter(schema_name=options["schema"])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['schema']}' does not exist.")
+
+        for tenant in tenants:
+            connection.set_tenant(tenant)
+            try:
+                deleted = purge_expired_tombstones()
+            finally:
+                connection.set_schema_to_public()
+            if deleted:
+                self.stdout.write(f"  {tenant.schema_name}: {deleted} tombstone(s)")
+        self.stdout.write(self.style.SUCCESS("Expired tombstones purged."))
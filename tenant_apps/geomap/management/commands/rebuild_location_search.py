@@ -0,0 +1,43 @@
+"""
+Management command recomputing the full-text search vectors of locations.
+
+Needed once after adding the search column, after bulk writes that bypass
+the post_save signal, and when a tenant changes its default language.
+
+Usage:
+    python manage.py rebuild_location_search --schema tenant_acme
+    python manage.py rebuild_location_search --all
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+
+from public_apps.customers.models import Client
+from tenant_apps.geomap.models import Location
+from tenant_apps.geomap.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Recompute location search vectors with the tenant's language."
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--schema", help="Tenant schema name.")
+        group.add_argument("--all", action="store_true", help="All tenants.")
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if not options["all"]:
+            tenants = tenants.filter(schema_name=options["schema"])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['schema']}' does not exist.")
+
+        for tenant in tenants:
+            connection.set_tenant(tenant)
+            try:
+                count = update_search_vectors(Location.objects.all())
+            finally:
+                connection.set_schema_to_public()
+            self.stdout.write(f"  {tenant.schema_name}: {count} locations updated.")
+        self.stdout.write(self.style.SUCCESS("Search vectors rebuilt."))
@@ -0,0 +1,42 @@
+"""
+Management command recounting the per-canton / per-type location statistics.
+
+Needed once after adding the statistics table, and after writes that bypass
+the Location signals (queryset updates, raw SQL).
+
+Usage:
+    python manage.py rebuild_location_statistics --schema tenant_acme
+    python manage.py rebuild_location_statistics --all
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+
+from public_apps.customers.models import Client
+from tenant_apps.geomap.stats import rebuild_statistics
+
+
+class Command(BaseCommand):
+    help = "Recount the location statistics per canton and location type."
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--schema", help="Tenant schema name.")
+        group.add_argument("--all", action="store_true", help="All tenants.")
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if not options["all"]:
+            tenants = tenants.filter(schema_name=options["schema"])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['schema']}' does not exist.")
+
+        for tenant in tenants:
+            connection.set_tenant(tenant)
+            try:
+                count = rebuild_statistics()
+            finally:
+                connection.set_schema_to_public()
+            self.stdout.write(f"  {tenant.schema_name}: {count} groups.")
+        self.stdout.write(self.style.SUCCESS("Location statistics rebuilt."))
@@ -0,0 +1,48 @@
+"""
+Management command running the location imports queued from the admin.
+
+Each pending LocationImport is claimed, imported and marked done or failed
+with its result, outside the web workers. Run it from a scheduler (cron,
+a Render cron job) or a worker loop; concurrent runners skip each other's
+jobs.
+
+Usage:
+    python manage.py run_location_imports --all
+    python manage.py run_location_imports --schema tenant_acme
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+
+from public_apps.customers.models import Client
+from tenant_apps.geomap.importer import run_pending_imports
+
+
+class Command(BaseCommand):
+    help = "Run the queued location imports."
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--schema", help="Tenant schema name.")
+        group.add_argument("--all", action="store_true", help="All tenants.")
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if not options["all"]:
+            tenants = tenants.filter(schema_name=options["schema"])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['schema']}' does not exist.")
+
+        for tenant in tenants:
+            connection.set_tenant(tenant)
+            try:
+                jobs = run_pending_imports()
+            finally:
+                connection.set_schema_to_public()
+            for job in jobs:
+                style = self.style.SUCCESS if job.status == "done" else self.style.ERROR
+                self.stdout.write(
+                    style(f"  {tenant.schema_name}: {job.original_name} {job.status}")
+                )
+        self.stdout.write(self.style.SUCCESS("Location imports processed."))
@@ -1,6 +1,14 @@
+from django.conf import settings
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex, GistIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .functions import CurrentTransactionId, geography
+
 
 class TimeStampedModel(models.Model):
     """Abstract base model with created/modified timestamps."""
@@ -12,6 +20,40 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+class TableStateQuerySet(models.QuerySet):
+    """
+    Queryset of a table served with conditional requests (see
+    cache.get_table_state). Bulk writes bypass the save/delete signals, so
+    they move `updated_at` and refresh the cached table state themselves.
+    """
+
+    def _touch_table_state(self):
+        from .cache import touch_table_state
+
+        model = self.model
+        transaction.on_commit(lambda: touch_table_state(model), using=self.db)
+
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        rows = super().update(**kwargs)
+        self._touch_table_state()
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs, now = list(objs), timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        fields = {*fields, "updated_at"}
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        self._touch_table_state()
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        self._touch_table_state()
+        return created
+
+
 class SwissCantons(models.TextChoices):
     """Swiss canton abbreviations."""
 
@@ -96,6 +138,8 @@ class LocationType(TimeStampedModel):
     )
     is_active = models.BooleanField(_("active"), default=True)
 
+    objects = TableStateQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("location type")
         verbose_name_plural = _("location types")
@@ -105,6 +149,29 @@ class LocationType(TimeStampedModel):
         return self.name
 
 
+class LocationQuerySet(models.QuerySet):
+    """
+    Queryset updates move the rows past every change feed cursor, like
+    Location.save(), unless they only write fields the feed does not carry.
+    """
+
+    # Derived columns, recomputed without the row changing for API clients
+    UNSYNCED_FIELDS = {"search_vector"}
+
+    def update(self, **kwargs):
+        if kwargs.keys() - self.UNSYNCED_FIELDS:
+            kwargs.setdefault("change_xid", CurrentTransactionId())
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        if set(fields) - self.UNSYNCED_FIELDS and "change_xid" not in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.change_xid = CurrentTransactionId()
+            fields = [*fields, "change_xid"]
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+
 class Location(TimeStampedModel, AddressMixin):
     """A geographic point of interest displayed on the map."""
 
@@ -132,15 +199,79 @@ class Location(TimeStampedModel, AddressMixin):
     website = models.URLField(_("website"), blank=True, default="")
     phone = models.CharField(_("phone"), max_length=30, blank=True, default="")
     email = models.EmailField(_("email"), blank=True, default="")
+    external_id = models.CharField(
+        _("external ID"),
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text=_("Identifier in the source system, used by bulk upserts."),
+    )
+    search_vector = SearchVectorField(_("search vector"), null=True, editable=False)
+    # Change feed positions (see changes.py): ids of the transactions that
+    # created and last wrote the row
+    created_xid = models.BigIntegerField(
+        _("created in transaction"), editable=False, db_default=CurrentTransactionId()
+    )
+    change_xid = models.BigIntegerField(
+        _("changed in transaction"), editable=False, db_default=CurrentTransactionId()
+    )
+
+    objects = LocationQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("location")
         verbose_name_plural = _("locations")
         ordering = ["name"]
+        indexes = [
+            # Serves radius (ST_DWithin) and nearest (<->) queries in meters
+            GistIndex(geography("point"), name="geomap_location_geog_gist"),
+            # Viewport, tile and cluster queries only read active locations;
+            # the included columns allow index-only bbox aggregates
+            GistIndex(
+                fields=["point"],
+                name="geomap_location_active_gist",
+                condition=models.Q(is_active=True),
+                include=["canton", "location_type"],
+            ),
+            # Keyset pagination of the locations API (always is_active=True)
+            models.Index(
+                fields=["name", "id"],
+                name="geomap_location_active_name",
+                condition=models.Q(is_active=True),
+            ),
+            # API filters on is_active/location_type, ordered by name
+            models.Index(
+                fields=["is_active", "location_type", "name"],
+                name="geomap_location_act_type_name",
+            ),
+            # Admin icontains search: UPPER(col) LIKE UPPER('%term%')
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                OpClass(Upper("description"), name="gin_trgm_ops"),
+                OpClass(Upper("city"), name="gin_trgm_ops"),
+                OpClass(Upper("street"), name="gin_trgm_ops"),
+                name="geomap_location_search_trgm",
+            ),
+            # Full-text search of the locations API
+            GinIndex(fields=["search_vector"], name="geomap_location_search_gin"),
+            # Change feed: rows written after a (change_xid, id) cursor
+            models.Index(
+                fields=["change_xid", "id"], name="geomap_location_change_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Move the row past every change feed cursor issued so far
+        self.change_xid = CurrentTransactionId()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "change_xid"}
+        super().save(*args, **kwargs)
+
     @property
     def latitude(self):
         if self.point:
@@ -154,6 +285,114 @@ class Location(TimeStampedModel, AddressMixin):
         return None
 
 
+class LocationTombstone(models.Model):
+    """A deleted location, kept for the change feed (see changes.py)."""
+
+    location_id = models.BigIntegerField(_("location ID"))
+    external_id = models.CharField(
+        _("external ID"), max_length=100, blank=True, default=""
+    )
+    deleted_at = models.DateTimeField(_("deleted at"), auto_now_add=True)
+    change_xid = models.BigIntegerField(
+        _("deleted in transaction"), editable=False, db_default=CurrentTransactionId()
+    )
+
+    class Meta:
+        verbose_name = _("location tombstone")
+        verbose_name_plural = _("location tombstones")
+        indexes = [
+            models.Index(
+                fields=["change_xid", "id"], name="geomap_tombstone_change_idx"
+            ),
+            models.Index(fields=["deleted_at"], name="geomap_tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return str(self.location_id)
+
+
+class LocationStatistic(models.Model):
+    """
+    Number of active locations per canton and location type, maintained
+    incrementally by the Location signals (see stats.py).
+    """
+
+    canton = models.CharField(
+        _("canton"),
+        max_length=2,
+        choices=SwissCantons.choices,
+        blank=True,
+        default="",
+    )
+    location_type = models.ForeignKey(
+        LocationType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("location type"),
+    )
+    count = models.IntegerField(_("count"), default=0)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("location statistic")
+        verbose_name_plural = _("location statistics")
+        constraints = [
+            # Target of the INSERT ... ON CONFLICT upserts in stats.py
+            models.UniqueConstraint(
+                fields=["canton", "location_type"],
+                name="geomap_location_stat_group",
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.canton or '-'} / {self.location_type_id or '-'}: {self.count}"
+
+
+class LocationImport(TimeStampedModel):
+    """
+    A location file uploaded for import. Jobs are run by the
+    run_location_imports command (see importer.run_pending_imports), which
+    records their status and result.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", _("Pending")),
+        ("running", _("Running")),
+        ("done", _("Done")),
+        ("failed", _("Failed")),
+    ]
+
+    file = models.FileField(_("file"), upload_to="geomap/imports/")
+    original_name = models.CharField(_("original name"), max_length=255)
+    options = models.JSONField(_("options"), default=dict, blank=True)
+    status = models.CharField(
+        _("status"), max_length=20, choices=STATUS_CHOICES, default="pending"
+    )
+    result = models.JSONField(_("result"), default=dict, blank=True)
+    error = models.TextField(_("error"), blank=True, default="")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("created by"),
+    )
+    started_at = models.DateTimeField(_("started at"), blank=True, null=True)
+    finished_at = models.DateTimeField(_("finished at"), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _("location import")
+        verbose_name_plural = _("location imports")
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.original_name} ({self.get_status_display()})"
+
+
 class MapLayer(TimeStampedModel):
     """Configuration for tile layers or overlay layers on the map."""
 
@@ -178,6 +417,8 @@ class MapLayer(TimeStampedModel):
     opacity = models.FloatField(_("opacity"), default=1.0)
     sort_order = models.PositiveIntegerField(_("sort order"), default=0)
 
+    objects = TableStateQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("map layer")
         verbose_name_plural = _("map layers")
@@ -185,3 +426,46 @@ class MapLayer(TimeStampedModel):
 
     def __str__(self):
         return self.name
+
+
+class MapOverlay(TimeStampedModel):
+    """
+    Vector overlay drawn over the map, e.g. service areas, boundaries or
+    routes. The generalized geometries are derived from `geometry` on save
+    (see overlays.simplify_overlays) and served for low zoom levels.
+    """
+
+    name = models.CharField(_("name"), max_length=100)
+    description = models.TextField(_("description"), blank=True, default="")
+    geometry = models.GeometryField(
+        _("geometry"),
+        srid=4326,
+        help_text=_("Polygons or lines in longitude/latitude."),
+    )
+    geometry_low = models.GeometryField(
+        _("low detail geometry"), srid=4326, null=True, editable=False
+    )
+    geometry_medium = models.GeometryField(
+        _("medium detail geometry"), srid=4326, null=True, editable=False
+    )
+    geometry_high = models.GeometryField(
+        _("high detail geometry"), srid=4326, null=True, editable=False
+    )
+    color = models.CharField(
+        _("color"),
+        max_length=7,
+        blank=True,
+        default="#3388ff",
+        help_text=_("Hex color for strokes and fills."),
+    )
+    fill_opacity = models.FloatField(_("fill opacity"), default=0.2)
+    is_active = models.BooleanField(_("active"), default=True)
+    sort_order = models.PositiveIntegerField(_("sort order"), default=0)
+
+    class Meta:
+        verbose_name = _("map overlay")
+        verbose_name_plural = _("map overlays")
+        ordering = ["sort_order", "name"]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,60 @@
+"""
+Levels of detail for map overlays.
+
+Each overlay stores its full geometry plus generalized copies computed with
+ST_SimplifyPreserveTopology, one per entry of DETAIL_LEVELS. A level is
+simplified with a tolerance of about half a pixel at its zoom level, so it
+looks identical to the full geometry up to that zoom while carrying a
+fraction of the vertices. The API picks the coarsest level that is still
+exact for the requested zoom and falls back to the full geometry beyond
+the last level.
+"""
+
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from .filters import degrees_per_pixel
+from .functions import SimplifyPreserveTopology
+
+# (field, highest zoom level the field is served for), coarsest first
+DETAIL_LEVELS = [
+    ("geometry_low", 6),
+    ("geometry_medium", 10),
+    ("geometry_high", 14),
+]
+GEOMETRY_FIELDS = ["geometry", *(name for name, _ in DETAIL_LEVELS)]
+TOLERANCE_PIXELS = 0.5
+
+
+def simplify_tolerance(zoom):
+    """Simplification tolerance in degrees for a zoom level."""
+    return TOLERANCE_PIXELS * degrees_per_pixel(zoom)
+
+
+def simplify_overlays(queryset):
+    """Recompute the generalized geometries of the overlays in `queryset`."""
+    return queryset.update(
+        **{
+            name: SimplifyPreserveTopology("geometry", simplify_tolerance(zoom))
+            for name, zoom in DETAIL_LEVELS
+        }
+    )
+
+
+def detail_field(zoom=None):
+    """Name of the geometry field to serve at `zoom` (None: full detail)."""
+    if zoom is not None:
+        for name, max_zoom in DETAIL_LEVELS:
+            if zoom <= max_zoom:
+                return name
+    return "geometry"
+
+
+def with_display_geometry(queryset, zoom=None):
+    """
+    Annotate `display_geometry` with the geometry for `zoom` and defer the
+    other geometry columns, so only one version is read per row.
+    """
+    name = detail_field(zoom)
+    display = F("geometry") if name == "geometry" else Coalesce(name, "geometry")
+    return queryset.annotate(display_geometry=display).defer(*GEOMETRY_FIELDS)
@@ -0,0 +1,31 @@
+from rest_framework.renderers import BaseRenderer
+
+from .columnar import encode_columns
+
+
+class MVTRenderer(BaseRenderer):
+    """Passes through Mapbox Vector Tile bytes."""
+
+    media_type = "application/vnd.mapbox-vector-tile"
+    format = "mvt"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return bytes(data)
+        return b""
+
+
+class LocationColumnsRenderer(BaseRenderer):
+    """Encodes columnar location payloads in the compact binary layout."""
+
+    media_type = "application/vnd.geomap.locations+octet-stream"
+    format = "bin"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict) or "ids" not in data:
+            return b""
+        return encode_columns(data)
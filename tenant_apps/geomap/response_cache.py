@@ -0,0 +1,196 @@
+"""
+Per-tenant cache of rendered geomap API responses.
+
+List and retrieve responses are stored gzip-compressed in the cache under a
+key made of the tenant schema, the view and its URL kwargs, the normalized
+query parameters, the scheme and host, the negotiated media type, the
+language and the view's permission classes. Responses never depend on the
+user beyond those permissions, so every user of a tenant shares the entries.
+
+Each key also embeds a per-tenant version counter of every model the view
+reads. Saving or deleting one of those models bumps its counter (see
+signals.py), which orphans all dependent entries at once.
+
+Concurrent misses on the same key are collapsed: the first request renders
+the response while the others poll the cache for it for at most LOCK_WAIT
+seconds, then render it themselves. The wait is kept short because it holds
+a worker thread. Responses are marked `Cache-Control: private`: they are
+shared between the users of a tenant here, not in intermediate caches.
+"""
+
+import gzip
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.text import compress_string
+from django.utils.translation import get_language
+
+from core.tenant_utils import get_schema_name
+
+from .cache import DATA_VERSION_TIMEOUT
+
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 0.25
+LOCK_POLL_INTERVAL = 0.05
+
+
+def get_response_cache():
+    return caches[getattr(settings, "GEOMAP_RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _model_version_key(model):
+    return f"geomap:model-version:{get_schema_name()}:{model._meta.label_lower}"
+
+
+def get_model_versions(models):
+    """Current per-tenant version of each model, in order."""
+    response_cache = get_response_cache()
+    keys = [_model_version_key(model) for model in models]
+    versions = response_cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in versions}
+    if missing:
+        response_cache.set_many(missing, timeout=DATA_VERSION_TIMEOUT)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model):
+    """Invalidate every cached response that reads `model` in this tenant."""
+    response_cache = get_response_cache()
+    key = _model_version_key(model)
+    try:
+        response_cache.add(key, 1, timeout=DATA_VERSION_TIMEOUT)
+        return response_cache.incr(key)
+    except ValueError:
+        response_cache.set(key, 2, timeout=DATA_VERSION_TIMEOUT)
+        return 2
+
+
+def normalize_query(query_params):
+    """Query string with sorted parameters and empty values dropped."""
+    items = sorted(
+        (name, value)
+        for name, values in query_params.lists()
+        for value in values
+        if value != ""
+    )
+    return urlencode(items)
+
+
+def versioned_cache_key(models, variant):
+    """Key of a response variant, embedding the versions of `models`."""
+    versions = ",".join(str(version) for version in get_model_versions(models))
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    return f"geomap:response:{get_schema_name()}:v{versions}:{digest}"
+
+
+def response_cache_key(request, view):
+    permissions = ",".join(
+        type(permission).__qualname__ for permission in view.get_permissions()
+    )
+    kwargs = ",".join(f"{k}={v}" for k, v in sorted(view.kwargs.items()))
+    variant = "|".join(
+        [
+            f"{view.basename}.{view.action}",
+            kwargs,
+            normalize_query(request.query_params),
+            # Bodies hold absolute URLs (cursor links, images)
+            request.scheme,
+            request.get_host(),
+            request.accepted_media_type,
+            get_language() or "",
+            permissions,
+        ]
+    )
+    return versioned_cache_key(view.get_cache_models(), variant)
+
+
+def cached_response(request, entry):
+    """Build a response from a cached (content_type, gzipped content) entry."""
+    content_type, content = entry
+    if "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+        response = HttpResponse(content, content_type=content_type)
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(gzip.decompress(content), content_type=content_type)
+    response["Content-Length"] = str(len(response.content))
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Serves list and retrieve from the tenant response cache. `cache_models`
+    lists the models whose changes invalidate the view's responses
+    (defaults to the queryset model).
+    """
+
+    cache_models = None
+
+    def get_cache_models(self):
+        return self.cache_models or [self.queryset.model]
+
+    def get_response_cache_timeout(self):
+        return getattr(settings, "GEOMAP_RESPONSE_CACHE_TIMEOUT", 300)
+
+    def cached_read(self, request, respond):
+        response = self.read_through_cache(request, respond)
+        patch_cache_control(response, private=True)
+        return response
+
+    def read_through_cache(self, request, respond):
+        response_cache = get_response_cache()
+        key = response_cache_key(request, self)
+        entry = response_cache.get(key)
+        if entry is not None:
+            return cached_response(request, entry)
+
+        lock_key = f"{key}:lock"
+        if not response_cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            # Another request is rendering this response: wait for it
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                found = response_cache.get_many([key, lock_key])
+                if key in found:
+                    return cached_response(request, found[key])
+                if lock_key not in found:
+                    # Rendering failed or produced an uncacheable response
+                    break
+            lock_key = None
+
+        try:
+            response = respond()
+        except Exception:
+            if lock_key:
+                response_cache.delete(lock_key)
+            raise
+
+        def store(rendered):
+            if rendered.status_code == 200 and not rendered.streaming:
+                response_cache.set(
+                    key,
+                    (rendered["Content-Type"], compress_string(rendered.content)),
+                    self.get_response_cache_timeout(),
+                )
+            if lock_key:
+                response_cache.delete(lock_key)
+
+        if hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(store)
+        elif lock_key:
+            response_cache.delete(lock_key)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        respond = super().list
+        return self.cached_read(request, lambda: respond(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        respond = super().retrieve
+        return self.cached_read(request, lambda: respond(request, *args, **kwargs))
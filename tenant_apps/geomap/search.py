@@ -0,0 +1,73 @@
+"""
+Location search: full-text on a stored tsvector plus trigram matching on
+the name for typos.
+
+`Location.search_vector` is built with the text search configuration of the
+tenant's default language. A generated column cannot do this, because its
+configuration would be a literal fixed by the migration shared by every
+tenant schema. The vector is therefore refreshed by the Location post_save
+signal, and by `update_search_vectors()` after bulk writes.
+"""
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+
+from core.tenant_utils import get_current_tenant
+
+SEARCH_CONFIGS = {
+    "da": "danish",
+    "de": "german",
+    "en": "english",
+    "es": "spanish",
+    "fr": "french",
+    "it": "italian",
+    "nl": "dutch",
+    "pt": "portuguese",
+}
+DEFAULT_SEARCH_CONFIG = "simple"
+TRIGRAM_RANK_WEIGHT = 0.5
+
+
+def get_search_config():
+    """Text search configuration for the current tenant's default language."""
+    tenant = get_current_tenant()
+    language = (getattr(tenant, "default_language", "") or "").split("-")[0]
+    return SEARCH_CONFIGS.get(language, DEFAULT_SEARCH_CONFIG)
+
+
+def location_search_vector(config=None):
+    config = config or get_search_config()
+    return (
+        SearchVector("name", weight="A", config=config)
+        + SearchVector("city", "canton", weight="B", config=config)
+        + SearchVector("street", "zip_code", weight="C", config=config)
+        + SearchVector("description", weight="D", config=config)
+    )
+
+
+def update_search_vectors(queryset):
+    """Recompute the search vector of every location in `queryset`."""
+    return queryset.update(search_vector=location_search_vector())
+
+
+def search_locations(queryset, text):
+    """
+    Filter `queryset` to locations matching `text`, ranked by full-text
+    rank plus trigram similarity of the name, best first.
+    """
+    query = SearchQuery(text, config=get_search_config(), search_type="websearch")
+    return (
+        queryset.alias(upper_name=Upper("name"))
+        .filter(Q(search_vector=query) | Q(upper_name__trigram_similar=text.upper()))
+        .annotate(
+            search_rank=SearchRank(F("search_vector"), query)
+            + TRIGRAM_RANK_WEIGHT * TrigramSimilarity(Upper("name"), text.upper())
+        )
+        .order_by("-search_rank", "id")
+    )
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from rest_framework_gis.fields import GeometryField
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
 
-from .models import LocationType, Location, MapLayer
+from .models import LocationType, Location, MapLayer, MapOverlay
 
 
 class LocationTypeSerializer(serializers.ModelSerializer):
@@ -10,12 +11,40 @@ class LocationTypeSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "icon", "color", "is_active"]
 
 
+class CoordinateField(serializers.FloatField):
+    """Float coordinate, rounded when the serializer sets a precision."""
+
+    precision = None
+
+    def to_representation(self, value):
+        value = super().to_representation(value)
+        return value if self.precision is None else round(value, self.precision)
+
+
+# Model columns needed by each LocationSerializer field, for `.only()`
+LOCATION_FIELD_COLUMNS = {
+    "latitude": ["point"],
+    "longitude": ["point"],
+    "location_type_name": ["location_type__name"],
+    "distance": [],
+}
+
+
 class LocationSerializer(GeoFeatureModelSerializer):
-    latitude = serializers.FloatField(read_only=True)
-    longitude = serializers.FloatField(read_only=True)
+    """
+    Location feature. The `fields` context (a set of field names) restricts
+    the output to a sparse fieldset, and `precision` rounds coordinates.
+    """
+
+    # Always returned, whatever the requested sparse fieldset
+    required_fields = ("id", "point")
+
+    latitude = CoordinateField(read_only=True)
+    longitude = CoordinateField(read_only=True)
     location_type_name = serializers.CharField(
         source="location_type.name", read_only=True, default=""
     )
+    distance = serializers.FloatField(read_only=True, default=None)
 
     class Meta:
         model = Location
@@ -38,10 +67,35 @@ class LocationSerializer(GeoFeatureModelSerializer):
             "website",
             "phone",
             "email",
+            "external_id",
             "created_at",
             "updated_at",
+            "distance",
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get("fields")
+        if requested:
+            for name in set(self.fields) - set(requested) - set(self.required_fields):
+                self.fields.pop(name)
+
+        precision = self.context.get("precision")
+        if precision is not None:
+            for name in ("point", "latitude", "longitude"):
+                if name in self.fields:
+                    self.fields[name].precision = precision
+
+    @classmethod
+    def get_source_columns(cls, fields):
+        """Model columns to load for a sparse fieldset."""
+        columns = []
+        for name in [*cls.required_fields, *fields]:
+            for column in LOCATION_FIELD_COLUMNS.get(name, [name]):
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
 
 class MapLayerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -57,3 +111,31 @@ class MapLayerSerializer(serializers.ModelSerializer):
             "opacity",
             "sort_order",
         ]
+
+
+class MapOverlaySerializer(GeoFeatureModelSerializer):
+    """
+    Overlay as a GeoJSON feature. The geometry is the `display_geometry`
+    annotation (see overlays.with_display_geometry), rounded to the
+    `precision` in the serializer context.
+    """
+
+    display_geometry = GeometryField(read_only=True)
+
+    class Meta:
+        model = MapOverlay
+        geo_field = "display_geometry"
+        fields = [
+            "id",
+            "name",
+            "description",
+            "color",
+            "fill_opacity",
+            "sort_order",
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        precision = self.context.get("precision")
+        if precision is not None:
+            self.fields["display_geometry"].precision = precision
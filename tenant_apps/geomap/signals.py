@@ -0,0 +1,122 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_data_version, invalidate_location, touch_table_state
+from .changes import record_deletion
+from .events import publish_location_event
+from .functions import CurrentTransactionId
+from .models import Location, LocationType, MapLayer, MapOverlay
+from .overlays import simplify_overlays
+from .response_cache import bump_model_version
+from .search import update_search_vectors
+from .stats import rebuild_statistics, record_location_change
+
+
+@receiver(pre_save, sender=Location)
+def remember_previous_location(sender, instance, **kwargs):
+    """
+    Keep the stored state so precise invalidation can clear the tiles of the
+    old position and statistics can leave the old group.
+    """
+    instance._previous_location = None
+    if instance.pk:
+        instance._previous_location = (
+            Location.objects.filter(pk=instance.pk)
+            .only("point", "location_type", "canton", "is_active")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Location)
+def invalidate_saved_location(sender, instance, **kwargs):
+    invalidate_location(getattr(instance, "_previous_location", None), instance)
+
+
+@receiver(post_save, sender=Location)
+def refresh_search_vector(sender, instance, **kwargs):
+    update_search_vectors(Location.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Location)
+def update_saved_location_statistics(sender, instance, **kwargs):
+    record_location_change(getattr(instance, "_previous_location", None), instance)
+
+
+@receiver(post_delete, sender=Location)
+def invalidate_deleted_location(sender, instance, **kwargs):
+    invalidate_location(instance, None)
+
+
+@receiver(post_delete, sender=Location)
+def update_deleted_location_statistics(sender, instance, **kwargs):
+    record_location_change(instance, None)
+
+
+@receiver(post_delete, sender=Location)
+def record_location_tombstone(sender, instance, **kwargs):
+    record_deletion(instance)
+
+
+@receiver(post_save, sender=LocationType)
+@receiver(post_delete, sender=LocationType)
+def invalidate_location_type(sender, instance, **kwargs):
+    bump_data_version()
+
+
+@receiver(pre_delete, sender=LocationType)
+def bump_locations_of_deleted_type(sender, instance, **kwargs):
+    """
+    Deleting a type sets location_type to NULL on its locations with an
+    UPDATE that bypasses Location.save() and LocationQuerySet.update(): move
+    them through the change feed here, in the same transaction.
+    """
+    Location.objects.filter(location_type=instance).update(
+        change_xid=CurrentTransactionId()
+    )
+
+
+@receiver(post_delete, sender=LocationType)
+def recount_after_location_type_delete(sender, instance, **kwargs):
+    # Its locations were moved to "no type" by a SET_NULL queryset update
+    rebuild_statistics()
+
+
+@receiver(post_save, sender=MapOverlay)
+def simplify_saved_overlay(sender, instance, **kwargs):
+    simplify_overlays(MapOverlay.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=LocationType)
+@receiver(post_save, sender=MapLayer)
+def touch_saved_table(sender, instance, **kwargs):
+    transaction.on_commit(lambda: touch_table_state(sender))
+
+
+@receiver(post_delete, sender=LocationType)
+@receiver(post_delete, sender=MapLayer)
+def touch_deleted_table(sender, instance, **kwargs):
+    transaction.on_commit(lambda: touch_table_state(sender, deleted=True))
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=LocationType)
+@receiver(post_save, sender=MapLayer)
+@receiver(post_save, sender=MapOverlay)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=LocationType)
+@receiver(post_delete, sender=MapLayer)
+@receiver(post_delete, sender=MapOverlay)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_model_version(sender))
+
+
+@receiver(post_save, sender=Location)
+def publish_saved_location(sender, instance, created, **kwargs):
+    action = "created" if created else "updated"
+    transaction.on_commit(lambda: publish_location_event(instance, action))
+
+
+@receiver(post_delete, sender=Location)
+def publish_deleted_location(sender, instance, **kwargs):
+    transaction.on_commit(lambda: publish_location_event(instance, "deleted"))
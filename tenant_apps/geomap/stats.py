@@ -0,0 +1,134 @@
+"""
+Location statistics per canton and location type.
+
+LocationStatistic holds one row per (canton, location type) group with the
+number of active locations. Saving or deleting a Location moves it between
+groups with a single INSERT ... ON CONFLICT DO UPDATE, so summaries read
+one row per group instead of counting every location. Bulk writes that
+bypass the signals (bulk upsert, imports, queryset updates) call
+`rebuild_statistics()` instead.
+
+Summaries restricted to a bbox cannot use the table; they are counted from
+the partial GiST index on active points, which includes the canton and
+location type columns so the count can run as an index-only scan.
+"""
+
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .filters import bbox_polygon
+from .models import Location, LocationStatistic, LocationType, SwissCantons
+
+UPSERT_SQL = """
+    INSERT INTO {table} (canton, location_type_id, count, updated_at)
+    VALUES {values}
+    ON CONFLICT (canton, location_type_id)
+    DO UPDATE SET count = {table}.count + EXCLUDED.count, updated_at = now()
+"""
+REBUILD_SQL = """
+    INSERT INTO {table} (canton, location_type_id, count, updated_at)
+    SELECT canton, location_type_id, count(*), now()
+    FROM {location_table}
+    WHERE is_active
+    GROUP BY canton, location_type_id
+"""
+
+
+def location_group(location):
+    """The (canton, location type id) group a location counts in, or None."""
+    if location is None or not location.is_active:
+        return None
+    return (location.canton or "", location.location_type_id)
+
+
+def adjust_statistics(deltas):
+    """Apply {(canton, location_type_id): delta} to the statistics table."""
+    deltas = {group: delta for group, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    params = []
+    for (canton, location_type_id), delta in deltas.items():
+        params.extend([canton, location_type_id, delta])
+    sql = UPSERT_SQL.format(
+        table=LocationStatistic._meta.db_table,
+        values=", ".join(["(%s, %s, %s, now())"] * len(deltas)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def record_location_change(old=None, new=None):
+    """Move a location from the group of `old` to the group of `new`."""
+    before, after = location_group(old), location_group(new)
+    if before == after:
+        return
+    deltas = Counter()
+    if before is not None:
+        deltas[before] -= 1
+    if after is not None:
+        deltas[after] += 1
+    adjust_statistics(deltas)
+
+
+def rebuild_statistics():
+    """Recount every group of the current tenant from the locations table."""
+    table = LocationStatistic._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Block incremental updates until the recount is committed
+        cursor.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(
+            REBUILD_SQL.format(table=table, location_table=Location._meta.db_table)
+        )
+        return cursor.rowcount
+
+
+def _group_counts(bbox=None):
+    """[(canton, location_type_id, count)] for the tenant or a bbox."""
+    if bbox is None:
+        rows = LocationStatistic.objects.filter(count__gt=0).values_list(
+            "canton", "location_type_id", "count"
+        )
+    else:
+        rows = (
+            Location.objects.filter(is_active=True, point__bboverlaps=bbox_polygon(bbox))
+            .order_by()
+            .values_list("canton", "location_type_id")
+            .annotate(count=Count("*"))
+        )
+    return list(rows)
+
+
+def location_summary(bbox=None):
+    """
+    Active location counts in total, per canton and per location type,
+    optionally restricted to a (minx, miny, maxx, maxy) bbox.
+    """
+    by_canton, by_type = Counter(), Counter()
+    for canton, location_type_id, count in _group_counts(bbox):
+        by_canton[canton] += count
+        by_type[location_type_id] += count
+
+    canton_names = dict(SwissCantons.choices)
+    type_names = dict(
+        LocationType.objects.filter(pk__in=[pk for pk in by_type if pk]).values_list(
+            "pk", "name"
+        )
+    )
+    return {
+        "count": sum(by_canton.values()),
+        "cantons": [
+            {
+                "canton": canton,
+                "name": str(canton_names.get(canton, "")),
+                "count": count,
+            }
+            for canton, count in sorted(by_canton.items())
+        ],
+        "location_types": [
+            {"id": pk, "name": type_names.get(pk, ""), "count": count}
+            for pk, count in sorted(by_type.items(), key=lambda item: -item[1])
+        ],
+    }
@@ -0,0 +1,128 @@
+"""
+Streaming GeoJSON output and exports for locations.
+
+Rows are read from a server-side cursor with `.values().iterator()` and
+encoded directly, without model instances or DRF field serialization, so
+memory stays flat whatever the size of the collection. Properties mirror
+LocationSerializer.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from core.export import RECORD_SEPARATOR, csv_chunks, json_lines_chunks
+
+LOCATION_STREAM_FIELDS = [
+    "id",
+    "name",
+    "description",
+    "location_type",
+    "location_type__name",
+    "point",
+    "street",
+    "street_number",
+    "zip_code",
+    "city",
+    "canton",
+    "is_active",
+    "image",
+    "website",
+    "phone",
+    "email",
+    "external_id",
+    "created_at",
+    "updated_at",
+]
+
+_datetime_field = serializers.DateTimeField()
+
+
+def location_feature(row, request=None):
+    """Build a GeoJSON feature dict from a `.values()` row."""
+    feature_id = row.pop("id")
+    point = row.pop("point")
+    row["location_type_name"] = row.pop("location_type__name") or ""
+    row["latitude"] = point.y if point else None
+    row["longitude"] = point.x if point else None
+    row["created_at"] = _datetime_field.to_representation(row["created_at"])
+    row["updated_at"] = _datetime_field.to_representation(row["updated_at"])
+    if row["image"]:
+        url = default_storage.url(row["image"])
+        row["image"] = request.build_absolute_uri(url) if request else url
+    else:
+        row["image"] = None
+    row.setdefault("distance", None)
+    return {
+        "id": feature_id,
+        "type": "Feature",
+        "geometry": (
+            {"type": "Point", "coordinates": [point.x, point.y]} if point else None
+        ),
+        "properties": row,
+    }
+
+
+def iter_location_features(queryset, request=None, chunk_size=None):
+    """Yield GeoJSON feature dicts from a server-side cursor."""
+    chunk_size = chunk_size or getattr(settings, "GEOMAP_STREAM_CHUNK_SIZE", 2000)
+    fields = list(LOCATION_STREAM_FIELDS)
+    if "distance" in queryset.query.annotations:
+        fields.append("distance")
+    for row in queryset.values(*fields).iterator(chunk_size=chunk_size):
+        yield location_feature(row, request)
+
+
+def stream_feature_collection(queryset, request=None, chunk_size=None):
+    """Yield a GeoJSON FeatureCollection as encoded byte chunks."""
+    chunk_size = chunk_size or getattr(settings, "GEOMAP_STREAM_CHUNK_SIZE", 2000)
+    yield b'{"type":"FeatureCollection","features":['
+    buffer = []
+    first = True
+    for feature in iter_location_features(queryset, request, chunk_size):
+        buffer.append(json.dumps(feature, separators=(",", ":")))
+        if len(buffer) >= chunk_size:
+            yield (("" if first else ",") + ",".join(buffer)).encode()
+            buffer = []
+            first = False
+    if buffer:
+        yield (("" if first else ",") + ",".join(buffer)).encode()
+    yield b"]}"
+
+
+LOCATION_EXPORT_FIELDS = [
+    "id",
+    "external_id",
+    "name",
+    "description",
+    "location_type",
+    "location_type_name",
+    "latitude",
+    "longitude",
+    "street",
+    "street_number",
+    "zip_code",
+    "city",
+    "canton",
+    "is_active",
+    "image",
+    "website",
+    "phone",
+    "email",
+    "created_at",
+    "updated_at",
+]
+
+
+def stream_location_export(queryset, export_format, request=None):
+    """Yield a CSV, NDJSON or GeoJSONSeq export of locations as byte chunks."""
+    features = iter_location_features(queryset, request)
+    if export_format == "geojsonseq":
+        return json_lines_chunks(features, prefix=RECORD_SEPARATOR)
+
+    records = ({"id": f["id"], **f["properties"]} for f in features)
+    if export_format == "csv":
+        return csv_chunks(records, LOCATION_EXPORT_FIELDS)
+    return json_lines_chunks(records)
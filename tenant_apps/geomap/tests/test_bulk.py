@@ -0,0 +1,96 @@
+import json
+
+from django.test import RequestFactory, SimpleTestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+
+from core.tests.base import TenantTestCase
+from tenant_apps.geomap.bulk import bulk_upsert, iter_features
+from tenant_apps.geomap.models import Location, LocationType
+
+
+def feature(external_id, name, lon=7.4474, lat=46.948, **properties):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {"external_id": external_id, "name": name, **properties},
+    }
+
+
+def bulk_request(body, content_type):
+    return Request(RequestFactory().post("/", body, content_type=content_type))
+
+
+class IterFeaturesTests(SimpleTestCase):
+    def test_feature_collection(self):
+        body = json.dumps(
+            {"type": "FeatureCollection", "features": [feature("a", "A")]}
+        )
+        features = list(iter_features(bulk_request(body, "application/geo+json")))
+        self.assertEqual([f["properties"]["external_id"] for f in features], ["a"])
+
+    def test_geojson_sequence(self):
+        lines = [
+            json.dumps(feature("a", "A")),
+            "",
+            "\x1e" + json.dumps(feature("b", "B")),
+        ]
+        request = bulk_request("\n".join(lines), "application/geo+json-seq")
+        features = list(iter_features(request))
+        self.assertEqual([f["properties"]["external_id"] for f in features], ["a", "b"])
+
+    def test_invalid_bodies(self):
+        for body, content_type in (
+            ("{", "application/json"),
+            ('{"type": "Feature"}', "application/json"),
+            ('{"type": "Feature"}\n{', "application/x-ndjson"),
+        ):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                list(iter_features(bulk_request(body, content_type)))
+
+
+class BulkUpsertTests(TenantTestCase):
+    def setUp(self):
+        self.location_type = LocationType.objects.create(name="Shop")
+
+    def test_insert_then_update_by_external_id(self):
+        report = bulk_upsert(
+            [
+                feature("a", "A", location_type=self.location_type.pk),
+                feature("b", "B"),
+            ]
+        )
+        self.assertEqual((report["upserted"], report["failed"]), (2, 0))
+
+        report = bulk_upsert([feature("a", "A renamed", lon=8.5, lat=47.4)])
+        self.assertEqual(report["upserted"], 1)
+        self.assertEqual(Location.objects.count(), 2)
+        location = Location.objects.get(external_id="a")
+        self.assertEqual(location.name, "A renamed")
+        self.assertEqual((location.point.x, location.point.y), (8.5, 47.4))
+        self.assertIsNotNone(location.search_vector)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        report = bulk_upsert(
+            [
+                feature("a", "A"),
+                feature(None, "No id"),
+                feature("c", "C", location_type=self.location_type.pk + 1000),
+                feature("d", ""),
+            ],
+            chunk_size=2,
+        )
+        self.assertEqual(
+            (report["received"], report["upserted"], report["failed"]), (4, 1, 3)
+        )
+        self.assertEqual([error["index"] for error in report["errors"]], [1, 2, 3])
+        self.assertIn("location_type", report["errors"][1]["errors"])
+        self.assertEqual(
+            list(Location.objects.values_list("external_id", flat=True)), ["a"]
+        )
+
+    def test_later_duplicate_in_a_chunk_wins(self):
+        report = bulk_upsert([feature("a", "First"), feature("a", "Second")])
+        self.assertEqual(report["upserted"], 1)
+        self.assertEqual(report["errors"][0]["index"], 0)
+        self.assertEqual(Location.objects.get(external_id="a").name, "Second")
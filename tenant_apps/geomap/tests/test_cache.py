@@ -0,0 +1,140 @@
+import time
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, override_settings
+
+from core.tests.base import TenantTestCase
+from tenant_apps.geomap import cache
+from tenant_apps.geomap.cache import (
+    bump_data_version,
+    get_data_version,
+    get_or_create_tile,
+    get_table_state,
+    invalidate_location,
+    invalidate_point_tiles,
+    tile_cache_key,
+    tile_for_point,
+    tiles_around_point,
+)
+from tenant_apps.geomap.models import LocationType
+from tenant_apps.geomap.tiles import MAX_TILE_ZOOM, MVT_BUFFER, MVT_EXTENT
+
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+class TilePositionTests(SimpleTestCase):
+    def test_tile_for_point(self):
+        self.assertEqual(tile_for_point(7.4474, 46.948, 10), (533, 360))
+        self.assertEqual(tile_for_point(0, 0, 0), (0, 0))
+
+    def test_tile_for_point_is_clamped(self):
+        self.assertEqual(tile_for_point(180, -90, 2), (3, 3))
+        self.assertEqual(tile_for_point(-180, 90, 2), (0, 0))
+
+    def test_tiles_around_point(self):
+        margin = MVT_BUFFER / MVT_EXTENT
+        self.assertEqual(tiles_around_point(7.4474, 46.948, 10, margin), [(533, 360)])
+        # On the corner of four tiles, every one of them draws the point
+        self.assertEqual(
+            tiles_around_point(0, 0, 1, margin), [(0, 0), (0, 1), (1, 0), (1, 1)]
+        )
+        self.assertEqual(tiles_around_point(-180, 85.06, 1, margin), [(0, 0)])
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES,
+    GEOMAP_TILE_CACHE_ALIAS="default",
+    GEOMAP_VERSION_CACHE_ALIAS="default",
+)
+class TileCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.get_tile_cache().clear()
+        patcher = mock.patch.object(cache, "get_schema_name", return_value="acme")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tiles_are_built_once(self):
+        build = mock.Mock(return_value=b"tile")
+        first = get_or_create_tile("mvt", 10, 533, 360, build)
+        second = get_or_create_tile("mvt", 10, 533, 360, build)
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], b"tile")
+        build.assert_called_once()
+
+    def test_bumping_the_version_orphans_every_tile(self):
+        version = get_data_version()
+        key = tile_cache_key("mvt", 10, 533, 360)
+        self.assertEqual(bump_data_version(), version + 1)
+        self.assertNotEqual(tile_cache_key("mvt", 10, 533, 360), key)
+
+    def test_versions_are_per_tenant(self):
+        bump_data_version()
+        with mock.patch.object(cache, "get_schema_name", return_value="other"):
+            self.assertEqual(get_data_version(), 1)
+            other_key = tile_cache_key("mvt", 0, 0, 0)
+        self.assertNotEqual(tile_cache_key("mvt", 0, 0, 0), other_key)
+
+    def test_precise_invalidation(self):
+        build = mock.Mock(return_value=b"tile")
+        bern = Point(7.4474, 46.948, srid=4326)
+        for x, y, variant in ((533, 360, None), (533, 360, "3"), (0, 0, None)):
+            get_or_create_tile("mvt", 10, x, y, build, variant)
+
+        invalidate_point_tiles([bern], {"3"})
+        tile_cache = cache.get_tile_cache()
+        self.assertIsNone(tile_cache.get(tile_cache_key("mvt", 10, 533, 360)))
+        self.assertIsNone(tile_cache.get(tile_cache_key("mvt", 10, 533, 360, "3")))
+        self.assertIsNotNone(tile_cache.get(tile_cache_key("mvt", 10, 0, 0)))
+
+    def test_precise_invalidation_stops_at_the_tile_zoom_cap(self):
+        with mock.patch.object(cache, "get_tile_cache") as get_tile_cache:
+            invalidate_point_tiles([Point(7.4474, 46.948, srid=4326)], set())
+        (keys,), _ = get_tile_cache.return_value.delete_many.call_args
+        zooms = {int(key.split(":")[4].split("/")[0]) for key in keys}
+        self.assertEqual(zooms, set(range(MAX_TILE_ZOOM + 1)))
+
+    @override_settings(GEOMAP_TILE_INVALIDATION="version")
+    def test_location_changes_bump_the_version(self):
+        version = get_data_version()
+        invalidate_location(None, mock.Mock(point=None, location_type_id=None))
+        self.assertEqual(get_data_version(), version + 1)
+
+    @override_settings(GEOMAP_TILE_INVALIDATION="precise")
+    def test_precise_invalidation_keeps_the_version(self):
+        version = get_data_version()
+        location = mock.Mock(point=Point(7.4474, 46.948), location_type_id=3)
+        invalidate_location(location, location)
+        self.assertEqual(get_data_version(), version)
+
+
+@override_settings(CACHES=LOCAL_CACHES, GEOMAP_VERSION_CACHE_ALIAS="default")
+class TableStateTests(TenantTestCase):
+    def setUp(self):
+        cache.get_version_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shop = LocationType.objects.create(name="Shop")
+            self.cafe = LocationType.objects.create(name="Cafe")
+
+    def test_queryset_update_changes_the_state(self):
+        state = get_table_state(LocationType)
+        with self.captureOnCommitCallbacks(execute=True):
+            LocationType.objects.filter(pk=self.shop.pk).update(color="#000000")
+        self.assertNotEqual(get_table_state(LocationType), state)
+
+    def test_bulk_update_changes_the_state(self):
+        state = get_table_state(LocationType)
+        self.cafe.color = "#ffffff"
+        with self.captureOnCommitCallbacks(execute=True):
+            LocationType.objects.bulk_update([self.cafe], ["color"])
+        self.assertNotEqual(get_table_state(LocationType), state)
+
+    @override_settings(GEOMAP_TABLE_STATE_TIMEOUT=0.05)
+    def test_state_expires(self):
+        get_table_state(LocationType)
+        key = cache._table_state_key(LocationType)
+        self.assertIsNotNone(cache.get_version_cache().get(key))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get_version_cache().get(key))
@@ -0,0 +1,147 @@
+import base64
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+
+from core.tests.base import TenantTestCase
+from tenant_apps.geomap import changes
+from tenant_apps.geomap.changes import (
+    CursorExpired,
+    decode_cursor,
+    encode_cursor,
+    get_changes,
+    purge_expired_tombstones,
+)
+from tenant_apps.geomap.models import Location, LocationTombstone, LocationType
+
+
+class ChangeCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        issued_at = timezone.now()
+        cursor = encode_cursor((10, 3), (12, 1), issued_at)
+        self.assertEqual(decode_cursor(cursor), ((10, 3), (12, 1), issued_at))
+
+    def test_invalid(self):
+        cursors = ["%%%", "bm90IGpzb24="]  # not base64, not JSON
+        # Too few values, not numbers, no issue time
+        for values in ([1, 2], ["a", 1, 2, 3, ""], [1, 2, 3, 4, "x"]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode())
+            cursors.append(cursor.decode())
+        for cursor in cursors:
+            with self.subTest(cursor=cursor), self.assertRaises(ParseError):
+                decode_cursor(cursor)
+
+
+class ChangeFeedTests(TenantTestCase):
+    """
+    Every row of a test is written by the same transaction, so later
+    transactions are simulated by moving change_xid forward.
+    """
+
+    def setUp(self):
+        self.locations = [
+            Location.objects.create(name=f"Location {i}", point=Point(7.4, 46.9))
+            for i in range(3)
+        ]
+        self.xid = Location.objects.values_list("change_xid", flat=True).first()
+
+    def get_changes(self, horizon, since=None, limit=500):
+        with mock.patch.object(changes, "get_horizon", return_value=horizon):
+            return get_changes(since, limit=limit)
+
+    def test_rows_of_running_transactions_are_held_back(self):
+        result = self.get_changes(self.xid)
+        self.assertEqual(result["created"], [])
+        result = self.get_changes(self.xid + 1, result["cursor"])
+        self.assertEqual(len(result["created"]), 3)
+
+    def test_pages(self):
+        first = self.get_changes(self.xid + 1, limit=2)
+        self.assertTrue(first["has_more"])
+        second = self.get_changes(self.xid + 1, first["cursor"], limit=2)
+        self.assertFalse(second["has_more"])
+        self.assertEqual(
+            [location.pk for location in first["created"] + second["created"]],
+            [location.pk for location in self.locations],
+        )
+        third = self.get_changes(self.xid + 1, second["cursor"])
+        self.assertEqual(third["created"] + third["updated"] + third["deleted"], [])
+
+    def test_updates_and_deletions(self):
+        cursor = self.get_changes(self.xid + 1)["cursor"]
+        updated, deactivated, deleted = self.locations
+        Location.objects.filter(pk=updated.pk).update(change_xid=F("change_xid") + 5)
+        Location.objects.filter(pk=deactivated.pk).update(
+            is_active=False, change_xid=F("change_xid") + 5
+        )
+        deleted.delete()
+        LocationTombstone.objects.update(change_xid=F("change_xid") + 5)
+
+        result = self.get_changes(self.xid + 10, cursor)
+        self.assertEqual(result["created"], [])
+        self.assertEqual([location.pk for location in result["updated"]], [updated.pk])
+        self.assertCountEqual(result["deleted"], [deactivated.pk, deleted.pk])
+
+    def test_new_replica_skips_existing_tombstones(self):
+        self.locations[0].delete()
+        result = self.get_changes(self.xid + 1)
+        self.assertEqual(result["deleted"], [])
+        self.assertEqual(len(result["created"]), 2)
+
+    def test_updates_outside_save_move_rows_forward(self):
+        location = self.locations[0]
+        location_type = LocationType.objects.create(name="Shop")
+        Location.objects.filter(pk=location.pk).update(
+            location_type=location_type, created_xid=0, change_xid=0
+        )
+        cursor = encode_cursor((0, location.pk), (self.xid + 1, 0), timezone.now())
+
+        # on_delete=SET_NULL updates the rows without Location.save()
+        location_type.delete()
+        result = self.get_changes(self.xid + 1, cursor)
+        self.assertIn(location.pk, [row.pk for row in result["updated"]])
+
+        Location.objects.filter(pk=location.pk).update(change_xid=0)
+        Location.objects.filter(pk=location.pk).update(city="Bern")
+        self.assertEqual(Location.objects.get(pk=location.pk).change_xid, self.xid)
+
+    def test_search_vector_updates_stay_out_of_the_feed(self):
+        Location.objects.update(change_xid=0)
+        Location.objects.update(search_vector=None)
+        self.assertEqual(
+            set(Location.objects.values_list("change_xid", flat=True)), {0}
+        )
+
+    def test_horizon(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+            )
+            xmin = cursor.fetchone()[0]
+        self.assertGreaterEqual(changes.get_horizon(), xmin)
+
+    def test_expired_tombstones_are_purged(self):
+        expired, kept = (location.pk for location in self.locations[:2])
+        for location in self.locations[:2]:
+            location.delete()
+        self.assertEqual(LocationTombstone.objects.count(), 2)
+        LocationTombstone.objects.filter(location_id=expired).update(
+            deleted_at=timezone.now() - changes.get_retention() - timedelta(days=1)
+        )
+        self.assertEqual(purge_expired_tombstones(), 1)
+        self.assertEqual(
+            list(LocationTombstone.objects.values_list("location_id", flat=True)),
+            [kept],
+        )
+
+    def test_expired_cursor(self):
+        issued_at = timezone.now() - changes.get_retention() - timedelta(minutes=1)
+        with self.assertRaises(CursorExpired):
+            self.get_changes(self.xid + 1, encode_cursor((0, 0), (0, 0), issued_at))
@@ -0,0 +1,98 @@
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+
+from tenant_apps.geomap.filters import (
+    MARKER_BUFFER_PIXELS,
+    MAX_PRECISION,
+    MAX_ZOOM,
+    bbox_polygon,
+    degrees_per_pixel,
+    parse_bbox,
+    parse_bounded_number,
+    parse_point,
+    parse_precision,
+    parse_zoom,
+)
+
+
+class ParseBboxTests(SimpleTestCase):
+    def test_valid(self):
+        self.assertEqual(parse_bbox("7.3,46.9,7.6,47"), (7.3, 46.9, 7.6, 47.0))
+
+    def test_invalid(self):
+        for value in (None, "", "7.3,46.9,7.6", "7.3,46.9,7.6,47,1", "a,b,c,d"):
+            with self.subTest(value=value), self.assertRaises(ParseError):
+                parse_bbox(value)
+
+    def test_min_exceeds_max(self):
+        with self.assertRaisesMessage(ParseError, "min values exceed max values"):
+            parse_bbox("7.6,46.9,7.3,47")
+
+    def test_error_names_the_parameter(self):
+        with self.assertRaisesMessage(ParseError, "Invalid viewport"):
+            parse_bbox("x", param="viewport")
+
+
+class ParseZoomTests(SimpleTestCase):
+    def test_valid(self):
+        self.assertEqual(parse_zoom("0"), 0)
+        self.assertEqual(parse_zoom(str(MAX_ZOOM)), MAX_ZOOM)
+
+    def test_invalid(self):
+        for value in (None, "", "1.5", "-1", str(MAX_ZOOM + 1)):
+            with self.subTest(value=value), self.assertRaises(ParseError):
+                parse_zoom(value)
+
+
+class BboxPolygonTests(SimpleTestCase):
+    def test_without_zoom(self):
+        polygon = bbox_polygon((7.3, 46.9, 7.6, 47.0))
+        self.assertEqual(polygon.srid, 4326)
+        self.assertEqual(polygon.extent, (7.3, 46.9, 7.6, 47.0))
+
+    def test_padded_by_the_marker_size(self):
+        pad = MARKER_BUFFER_PIXELS * degrees_per_pixel(10)
+        minx, miny, maxx, maxy = bbox_polygon((7.3, 46.9, 7.6, 47.0), zoom=10).extent
+        self.assertAlmostEqual(minx, 7.3 - pad)
+        self.assertAlmostEqual(maxy, 47.0 + pad)
+
+    def test_clamped_to_the_world(self):
+        polygon = bbox_polygon((-180, -90, 180, 90), zoom=0)
+        self.assertEqual(polygon.extent, (-180.0, -90.0, 180.0, 90.0))
+
+
+class ParsePointTests(SimpleTestCase):
+    def test_valid(self):
+        point = parse_point("7.4474,46.948", "near")
+        self.assertEqual((point.x, point.y, point.srid), (7.4474, 46.948, 4326))
+
+    def test_invalid(self):
+        for value in (None, "7.4", "7.4,46.9,1", "a,b", "181,0", "0,-91"):
+            with self.subTest(value=value), self.assertRaises(ParseError):
+                parse_point(value, "near")
+
+
+class ParseBoundedNumberTests(SimpleTestCase):
+    def test_valid(self):
+        self.assertEqual(parse_bounded_number("250.5", "radius", 1000), 250.5)
+        self.assertEqual(parse_bounded_number("10", "k", 10, cast=int), 10)
+
+    def test_invalid(self):
+        for value in (None, "", "abc", "0", "-5", "1001"):
+            with self.subTest(value=value), self.assertRaises(ParseError):
+                parse_bounded_number(value, "radius", 1000)
+
+
+class ParsePrecisionTests(SimpleTestCase):
+    def test_default_when_missing(self):
+        self.assertEqual(parse_precision(None), MAX_PRECISION)
+        self.assertEqual(parse_precision("", default=3), 3)
+
+    def test_valid(self):
+        self.assertEqual(parse_precision("0"), 0)
+        self.assertEqual(parse_precision(str(MAX_PRECISION)), MAX_PRECISION)
+
+    def test_invalid(self):
+        for value in ("x", "2.5", "-1", str(MAX_PRECISION + 1)):
+            with self.subTest(value=value), self.assertRaises(ParseError):
+                parse_precision(value)
@@ -0,0 +1,90 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core.tests.base import TenantTestCase
+from tenant_apps.geomap.importer import build_field_map, import_locations
+from tenant_apps.geomap.models import Location, LocationType
+
+
+class BuildFieldMapTests(SimpleTestCase):
+    def test_aliases_are_matched_case_insensitively(self):
+        field_map = build_field_map(["ID", "Title", "Category", "PLZ", "Other"])
+        self.assertEqual(
+            field_map,
+            {
+                "external_id": "ID",
+                "name": "Title",
+                "location_type": "Category",
+                "zip_code": "PLZ",
+            },
+        )
+
+    def test_explicit_mapping_wins(self):
+        field_map = build_field_map(["id", "ref"], mapping={"external_id": "ref"})
+        self.assertEqual(field_map["external_id"], "ref")
+
+
+class ImportLocationsTests(TenantTestCase):
+    def import_csv(self, content, **options):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+        return import_locations(f.name, **options)
+
+    def test_merge(self):
+        result = self.import_csv(
+            "id,name,type,lon,lat,is_active\n"
+            "a,Bakery,Shop,7.44,46.95,yes\n"
+            "b,,Shop,7.45,46.95,yes\n"
+            "c,Old name,Shop,8.54,47.37,yes\n"
+            "c,New name,Cafe,8.55,47.38,no\n"
+            ",Unnamed source row,,8.0,47.0,\n",
+            batch_size=2,
+        )
+        self.assertEqual((result.read, result.skipped, result.errors), (5, 1, []))
+        self.assertEqual(result.merged, 3)
+
+        locations = {location.name: location for location in Location.objects.all()}
+        self.assertEqual(set(locations), {"Bakery", "New name", "Unnamed source row"})
+        self.assertEqual(locations["New name"].external_id, "c")
+        self.assertFalse(locations["New name"].is_active)
+        self.assertTrue(locations["Bakery"].is_active)
+        self.assertEqual(locations["New name"].location_type.name, "Cafe")
+        self.assertIsNone(locations["Unnamed source row"].external_id)
+        self.assertAlmostEqual(locations["Bakery"].point.x, 7.44)
+        self.assertEqual(
+            set(LocationType.objects.values_list("name", flat=True)), {"Shop", "Cafe"}
+        )
+        self.assertFalse(Location.objects.filter(search_vector__isnull=True).exists())
+
+    def test_reimport_updates_by_external_id(self):
+        self.import_csv("id,name,lon,lat\na,Bakery,7.44,46.95\n")
+        created = Location.objects.get(external_id="a")
+
+        result = self.import_csv("id,name,lon,lat\na,Bakery & Cafe,7.45,46.96\n")
+        self.assertEqual(result.merged, 1)
+        location = Location.objects.get(external_id="a")
+        self.assertEqual(location.pk, created.pk)
+        self.assertEqual(location.name, "Bakery & Cafe")
+        self.assertEqual(location.created_at, created.created_at)
+        self.assertAlmostEqual(location.point.y, 46.96)
+
+    def test_reimport_duplicates_rows_without_external_id(self):
+        content = "id,name,lon,lat\na,Bakery,7.44,46.95\n,Kiosk,7.45,46.95\n"
+        self.import_csv(content)
+        result = self.import_csv(content)
+        self.assertEqual(result.merged, 2)
+        self.assertEqual(Location.objects.filter(external_id="a").count(), 1)
+        self.assertEqual(Location.objects.filter(name="Kiosk").count(), 2)
+
+    def test_projected_coordinates_are_transformed(self):
+        # Bern in the Swiss LV95 grid
+        self.import_csv("id,name,x,y\nbern,Bern,2600000,1200000\n", srid=2056)
+        point = Location.objects.get(external_id="bern").point
+        self.assertEqual(point.srid, 4326)
+        self.assertAlmostEqual(point.x, 7.4396, places=3)
+        self.assertAlmostEqual(point.y, 46.9524, places=3)
@@ -0,0 +1,27 @@
+import json
+
+from django.db import connection, transaction
+
+from core.tests.base import TenantTestCase
+from tenant_apps.geomap.management.commands.check_query_plans import (
+    get_plan_checks,
+    plan_index_names,
+)
+
+
+class QueryPlanTests(TenantTestCase):
+    """The checks of `check_query_plans`, run by the test suite in CI."""
+
+    def test_queries_use_their_indexes(self):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            for description, queryset, expected in get_plan_checks():
+                with self.subTest(description):
+                    plan = json.loads(queryset.explain(format="json"))
+                    used = plan_index_names(plan)
+                    self.assertTrue(
+                        used & expected,
+                        f"expected {', '.join(sorted(expected))}, "
+                        f"used {', '.join(sorted(used)) or 'no index'}",
+                    )
@@ -0,0 +1,114 @@
+import json
+from unittest import mock
+
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from tenant_apps.geomap import response_cache
+from tenant_apps.geomap.models import Location, LocationType, MapLayer
+from tenant_apps.geomap.response_cache import (
+    CachedResponseMixin,
+    bump_model_version,
+    normalize_query,
+    response_cache_key,
+)
+
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+class LocationView(CachedResponseMixin):
+    basename = "location"
+    action = "list"
+    cache_models = [Location, LocationType]
+
+    def __init__(self):
+        self.kwargs = {}
+        self.renders = 0
+
+    def get_permissions(self):
+        return [IsAuthenticated()]
+
+    def respond(self):
+        self.renders += 1
+        response = Response({"renders": self.renders})
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = "application/json"
+        response.renderer_context = {}
+        return response
+
+
+def api_request(path="/geomap/api/locations/?page_size=10", **headers):
+    request = Request(RequestFactory().get(path, **headers))
+    request.accepted_media_type = "application/json"
+    return request
+
+
+class NormalizeQueryTests(SimpleTestCase):
+    def test_sorted_without_empty_values(self):
+        query = QueryDict("zoom=5&bbox=1,2,3,4&q=&type=2&type=1")
+        self.assertEqual(
+            normalize_query(query), "bbox=1%2C2%2C3%2C4&type=1&type=2&zoom=5"
+        )
+
+
+@override_settings(CACHES=LOCAL_CACHES, GEOMAP_RESPONSE_CACHE_ALIAS="default")
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        response_cache.get_response_cache().clear()
+        patcher = mock.patch.object(
+            response_cache, "get_schema_name", return_value="acme"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.view = LocationView()
+
+    def read(self, request):
+        response = self.view.cached_read(request, self.view.respond)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def test_key_ignores_parameter_order(self):
+        self.assertEqual(
+            response_cache_key(api_request("/?a=1&b=2"), self.view),
+            response_cache_key(api_request("/?b=2&a=1&c="), self.view),
+        )
+
+    def test_key_varies_with_host_and_tenant(self):
+        key = response_cache_key(api_request(), self.view)
+        other_host = api_request(HTTP_HOST="other.testserver")
+        with self.settings(ALLOWED_HOSTS=["*"]):
+            self.assertNotEqual(response_cache_key(other_host, self.view), key)
+        with mock.patch.object(response_cache, "get_schema_name", return_value="b"):
+            self.assertNotEqual(response_cache_key(api_request(), self.view), key)
+
+    def test_key_changes_when_a_read_model_changes(self):
+        key = response_cache_key(api_request(), self.view)
+        bump_model_version(MapLayer)
+        self.assertEqual(response_cache_key(api_request(), self.view), key)
+        bump_model_version(LocationType)
+        self.assertNotEqual(response_cache_key(api_request(), self.view), key)
+
+    def test_responses_are_served_from_the_cache_until_invalidated(self):
+        first = self.read(api_request())
+        second = self.read(api_request())
+        self.assertEqual(self.view.renders, 1)
+        self.assertEqual(json.loads(second.content), json.loads(first.content))
+        self.assertIn("private", second["Cache-Control"])
+
+        bump_model_version(Location)
+        third = self.read(api_request())
+        self.assertEqual(self.view.renders, 2)
+        self.assertEqual(json.loads(third.content), {"renders": 2})
+
+    def test_gzip_clients_get_the_stored_body(self):
+        self.read(api_request())
+        response = self.read(api_request(HTTP_ACCEPT_ENCODING="gzip, br"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(self.view.renders, 1)
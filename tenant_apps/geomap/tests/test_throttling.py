@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.throttling import TokenBucket
+from tenant_apps.geomap import views
+from tenant_apps.geomap.views import LocationTileView
+
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class TileThrottleTests(SimpleTestCase):
+    def setUp(self):
+        TokenBucket._local_buckets.clear()
+        patcher = mock.patch.object(
+            views, "get_or_create_tile", return_value=("etag", b"")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_a_burst_of_tiles_is_not_throttled(self):
+        tenant = SimpleNamespace(
+            schema_name="acme", api_rate_limit=60, api_user_rate_limit=60
+        )
+        user = SimpleNamespace(is_authenticated=True, pk=1)
+        view = LocationTileView.as_view()
+        statuses = set()
+        # A few map sessions' worth of tiles, above the user and tenant rates
+        for x in range(300):
+            request = APIRequestFactory().get(f"/geomap/tiles/10/{x}/360.mvt")
+            request.tenant = tenant
+            force_authenticate(request, user=user)
+            statuses.add(view(request, z=10, x=x, y=360).status_code)
+        self.assertEqual(statuses, {200})
+        self.assertNotIn("throttle:tenant:acme", TokenBucket._local_buckets)
@@ -0,0 +1,64 @@
+"""
+Mapbox Vector Tiles for locations, rendered by PostGIS.
+
+Tiles are produced in the current tenant schema with ST_AsMVTGeom/ST_AsMVT
+in a single query; the `&&` filter on the buffered tile envelope is served
+by the GiST index on Location.point.
+"""
+
+from django.db import connection
+
+from .models import Location, LocationType
+
+MVT_LAYER_NAME = "locations"
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
+MAX_TILE_ZOOM = 22
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def render_location_tile(z, x, y, location_type=None):
+    """Return the MVT bytes for tile z/x/y (empty bytes for an empty tile)."""
+    location_table = connection.ops.quote_name(Location._meta.db_table)
+    type_table = connection.ops.quote_name(LocationType._meta.db_table)
+    params = [z, x, y, MVT_BUFFER / MVT_EXTENT, z, x, y, MVT_EXTENT, MVT_BUFFER]
+    type_clause = ""
+    if location_type is not None:
+        type_clause = "AND l.location_type_id = %s"
+        params.append(location_type)
+    params.extend([MVT_LAYER_NAME, MVT_EXTENT])
+
+    sql = f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s, margin => %s) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                ST_AsMVTGeom(
+                    ST_Transform(l.point, 3857),
+                    ST_TileEnvelope(%s, %s, %s),
+                    %s, %s, true
+                ) AS geom,
+                l.id,
+                l.name,
+                l.city,
+                l.location_type_id AS location_type,
+                t.name AS location_type_name,
+                t.color,
+                t.icon
+            FROM {location_table} l
+            LEFT JOIN {type_table} t ON t.id = l.location_type_id
+            CROSS JOIN bounds
+            WHERE l.is_active
+              AND l.point && ST_Transform(bounds.geom, 4326)
+              {type_clause}
+        )
+        SELECT ST_AsMVT(mvtgeom, %s, %s, 'geom', 'id') FROM mvtgeom
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] is not None else b""
@@ -1,24 +1,65 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from .async_views import (
+    AsyncLocationDetailView,
+    AsyncLocationListView,
+    AsyncLocationTypeListView,
+    AsyncMapLayerListView,
+)
 from .views import (
     MapView,
     LocationDetailView,
+    LocationEventsView,
     LocationViewSet,
+    LocationClusterViewSet,
+    LocationTileView,
     LocationTypeViewSet,
     MapLayerViewSet,
+    MapOverlayViewSet,
 )
 
 app_name = "geomap"
 
 router = DefaultRouter()
 router.register(r"locations", LocationViewSet, basename="location")
+router.register(
+    r"location-clusters", LocationClusterViewSet, basename="locationcluster"
+)
 router.register(r"location-types", LocationTypeViewSet, basename="locationtype")
 router.register(r"map-layers", MapLayerViewSet, basename="maplayer")
+router.register(r"map-overlays", MapOverlayViewSet, basename="mapoverlay")
 
 urlpatterns = [
     path("api/", include(router.urls)),
     path("map/", MapView.as_view(), name="map"),
+    path(
+        "tiles/<int:z>/<int:x>/<int:y>.mvt",
+        LocationTileView.as_view(),
+        name="location-tile",
+    ),
+    path("events/", LocationEventsView.as_view(), name="location-events"),
+    # Async-native read endpoints, for ASGI deployments
+    path(
+        "async/locations/",
+        AsyncLocationListView.as_view(),
+        name="async-location-list",
+    ),
+    path(
+        "async/locations/<int:pk>/",
+        AsyncLocationDetailView.as_view(),
+        name="async-location-detail",
+    ),
+    path(
+        "async/location-types/",
+        AsyncLocationTypeListView.as_view(),
+        name="async-locationtype-list",
+    ),
+    path(
+        "async/map-layers/",
+        AsyncMapLayerListView.as_view(),
+        name="async-maplayer-list",
+    ),
     path(
         "locations/<int:pk>/detail/",
         LocationDetailView.as_view(),
@@ -1,10 +1,61 @@
-from django.views.generic import TemplateView, DetailView
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.translation import get_language
+from django.views.generic import DetailView, TemplateView, View
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import LocationType, Location, MapLayer
-from .serializers import LocationTypeSerializer, LocationSerializer, MapLayerSerializer
+from core.compression import compress_on_render
+from core.export import export_response, streaming_response
+from core.pagination import (
+    TenantCursorPagination,
+    get_max_page_size,
+    get_requested_page_size,
+)
+from core.throttling import TenantTileRateThrottle
+from tenant_apps.users.models import UserActivity
+from tenant_apps.users.permissions import CanExportData, CanManageContent
+
+from .bulk import bulk_upsert, iter_features
+from .cache import get_or_create_tile, get_table_state, make_etag
+from .changes import get_changes
+from .clustering import get_clusters
+from .columnar import location_columns
+from .events import get_redis_url, relay, stream_events
+from .filters import (
+    LocationFilter,
+    bbox_polygon,
+    parse_bbox,
+    parse_precision,
+    parse_zoom,
+)
+from .geojson import db_feature_collection
+from .models import LocationType, Location, MapLayer, MapOverlay
+from .overlays import with_display_geometry
+from .renderers import LocationColumnsRenderer, MVTRenderer
+from .response_cache import CachedResponseMixin
+from .serializers import (
+    LocationTypeSerializer,
+    LocationSerializer,
+    MapLayerSerializer,
+    MapOverlaySerializer,
+)
+from .stats import location_summary
+from .streaming import stream_feature_collection, stream_location_export
+from .tiles import is_valid_tile, render_location_tile
 
 
 # ==========================================
@@ -34,27 +85,400 @@ class LocationDetailView(DetailView):
 # ==========================================
 
 
-class LocationViewSet(viewsets.ModelViewSet):
+def etag_matches(request, etag):
+    """Whether the client already holds the representation with this ETag."""
+    header = request.headers.get("If-None-Match", "")
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return f'"{etag}"' in candidates or "*" in candidates
+
+
+def with_etag(response, etag):
+    response["ETag"] = f'"{etag}"'
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified(etag):
+    return with_etag(Response(status=304), etag)
+
+
+class ConditionalReadMixin:
+    """
+    ETag and Last-Modified validators for list and retrieve, derived from the
+    cached state of the viewset's table (see cache.get_table_state). A
+    request whose If-None-Match / If-Modified-Since still matches gets a 304
+    before any query runs. `cache_control` is sent on every read response
+    and can be overridden per router basename in GEOMAP_CACHE_CONTROL.
+    """
+
+    cache_control = "private, no-cache"
+
+    def get_cache_control(self):
+        overrides = getattr(settings, "GEOMAP_CACHE_CONTROL", {})
+        return overrides.get(self.basename, self.cache_control)
+
+    def conditional_read(self, request, respond):
+        last_modified, table_etag = get_table_state(self.queryset.model)
+        # The representation also depends on the URL, renderer and language
+        variant = f"{request.get_full_path()}:{request.accepted_media_type}"
+        etag = '"%s"' % make_etag(f"{table_etag}:{variant}:{get_language()}".encode())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = respond()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+            response["Cache-Control"] = self.get_cache_control()
+        return response
+
+    def list(self, request, *args, **kwargs):
+        respond = super().list
+        return self.conditional_read(request, lambda: respond(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        respond = super().retrieve
+        return self.conditional_read(request, lambda: respond(request, *args, **kwargs))
+
+
+class LocationViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     CRUD API for locations.
-    Supports filtering by location_type.
+    Supports filtering by location_type, canton, is_active and a
+    bbox viewport (with optional zoom). Reads accept `fields=` for a sparse
+    fieldset (which also narrows the SQL select) and `precision=` for
+    coordinate decimals. List and retrieve responses are cached per tenant.
     """
 
-    queryset = Location.objects.filter(is_active=True).select_related("location_type")
+    queryset = (
+        Location.objects.filter(is_active=True)
+        .select_related("location_type")
+        .defer("search_vector")
+    )
     serializer_class = LocationSerializer
+    cache_models = [Location, LocationType]
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["location_type", "canton", "is_active"]
+    filterset_class = LocationFilter
+    pagination_class = TenantCursorPagination
+    ordering = ("name", "id")
+
+    def get_requested_fields(self):
+        """Sparse fieldset from `?fields=a,b,c` on read requests, or None."""
+        value = self.request.query_params.get("fields")
+        if not value or self.action not in ("list", "retrieve"):
+            return None
+        requested = {name.strip() for name in value.split(",") if name.strip()}
+        unknown = requested - set(LocationSerializer.Meta.fields)
+        if unknown:
+            raise ParseError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+        return requested
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields:
+            columns = LocationSerializer.get_source_columns(fields)
+            if "location_type__name" not in columns:
+                queryset = queryset.select_related(None)
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        # Nearest-neighbour results are already limited to k rows
+        if queryset.query.is_sliced:
+            return None
+        return super().paginate_queryset(queryset)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_requested_fields()
+        context["precision"] = parse_precision(
+            self.request.query_params.get("precision"), default=None
+        )
+        return context
+
+    @action(detail=False, methods=["get"])
+    def stream(self, request):
+        """
+        The whole filtered collection as one GeoJSON FeatureCollection,
+        streamed from a server-side cursor without pagination.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        response = streaming_response(
+            request,
+            stream_feature_collection(queryset, request),
+            "application/geo+json",
+        )
+        response["Cache-Control"] = "no-store"
+        return response
+
+    @action(detail=False, methods=["get"])
+    def geojson(self, request):
+        """
+        The whole filtered collection as one GeoJSON FeatureCollection,
+        generated by PostgreSQL. Read-only fast path for map clients.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        response = HttpResponse(
+            db_feature_collection(queryset), content_type="application/geo+json"
+        )
+        response["Cache-Control"] = "no-store"
+        return response
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        Locations created, updated (as GeoJSON features) and deleted (ids)
+        after the `since=` cursor returned by the previous call; everything
+        when omitted. Repeat while `has_more` is true.
+        """
+        changes = get_changes(
+            request.query_params.get("since"),
+            get_requested_page_size(request, get_max_page_size(request)),
+        )
+        for key in ("created", "updated"):
+            changes[key] = self.get_serializer(changes[key], many=True).data
+        response = Response(changes)
+        response["Cache-Control"] = "no-store"
+        return response
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        """
+        Active location counts in total, per canton and per location type.
+        Read from the precomputed statistics, or counted inside `bbox=`.
+        """
+        bbox = request.query_params.get("bbox")
+        return Response(location_summary(parse_bbox(bbox) if bbox else None))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"export\.(?P<export_format>csv|ndjson|geojsonseq)",
+        permission_classes=[CanExportData],
+    )
+    def export(self, request, export_format):
+        """
+        The filtered locations as a CSV, NDJSON or GeoJSONSeq download,
+        streamed from a server-side cursor. Requires `can_export_data`.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        UserActivity.log(
+            request.user,
+            "data_export",
+            request,
+            description="Locations export",
+            model="geomap.location",
+            format=export_format,
+            filters=request.query_params.dict(),
+        )
+        return export_response(
+            request,
+            stream_location_export(queryset, export_format, request),
+            export_format,
+            "locations",
+        )
+
+    @action(detail=False, methods=["post"], permission_classes=[CanManageContent])
+    def bulk(self, request):
+        """
+        Upsert locations keyed by external_id from a GeoJSON FeatureCollection
+        or an NDJSON / GeoJSONSeq stream of features, in chunked transactions.
+        Returns counts and a per-row error report. Requires `can_manage_content`.
+        """
+        return Response(bulk_upsert(iter_features(request)))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[JSONRenderer, LocationColumnsRenderer],
+    )
+    def columns(self, request):
+        """
+        Filtered location points as parallel arrays of ids, lon, lat and
+        location type ids, as JSON or packed binary (?format=bin).
+        `precision` sets the number of coordinate decimals.
+        """
+        precision = parse_precision(request.query_params.get("precision"))
+        queryset = self.filter_queryset(
+            self.get_queryset().filter(point__isnull=False)
+        )
+        response = Response(location_columns(queryset, precision))
+        response["Cache-Control"] = "no-store"
+        return compress_on_render(request, response)
+
+
+class LocationClusterViewSet(viewsets.ViewSet):
+    """
+    Clustered locations for a map viewport.
+    Requires bbox=minx,miny,maxx,maxy and zoom; accepts location_type.
+    Returns a GeoJSON FeatureCollection of cluster centroids with their
+    count and dominant location type.
+    """
+
+    # A viewport loads many cells per pan or zoom
+    throttle_classes = [TenantTileRateThrottle]
 
+    def list(self, request):
+        bbox = request.query_params.get("bbox")
+        zoom = request.query_params.get("zoom")
+        if not bbox or zoom in (None, ""):
+            raise ParseError("bbox and zoom are required.")
 
-class LocationTypeViewSet(ReadOnlyModelViewSet):
-    """Read-only API for location types."""
+        location_type = request.query_params.get("location_type") or None
+        if location_type is not None and not location_type.isdigit():
+            raise ParseError("Invalid location_type.")
+
+        queryset = Location.objects.filter(is_active=True, point__isnull=False)
+        if location_type:
+            queryset = queryset.filter(location_type_id=location_type)
+
+        etag, clusters = get_clusters(
+            queryset, parse_bbox(bbox), parse_zoom(zoom), location_type
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = Response(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "geometry": {
+                            "type": "Point",
+                            "coordinates": [cluster["lon"], cluster["lat"]],
+                        },
+                        "properties": {
+                            "count": cluster["count"],
+                            "location_type": cluster["location_type"],
+                        },
+                    }
+                    for cluster in clusters
+                ],
+            }
+        )
+        return with_etag(response, etag)
+
+
+class LocationTypeViewSet(
+    ConditionalReadMixin, CachedResponseMixin, ReadOnlyModelViewSet
+):
+    """Read-only API for location types, with conditional requests."""
 
     queryset = LocationType.objects.filter(is_active=True)
     serializer_class = LocationTypeSerializer
 
 
-class MapLayerViewSet(ReadOnlyModelViewSet):
-    """Read-only API for map layers."""
+class MapLayerViewSet(
+    ConditionalReadMixin, CachedResponseMixin, ReadOnlyModelViewSet
+):
+    """Read-only API for map layers, with conditional requests."""
 
     queryset = MapLayer.objects.filter(is_active=True)
     serializer_class = MapLayerSerializer
+
+
+class MapOverlayViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
+    """
+    Read-only API for map overlays (polygons and lines) as GeoJSON.
+    `zoom=` selects the precomputed level of detail for that zoom (full
+    detail when omitted), `bbox=` keeps the overlays whose bounding box
+    intersects the viewport and `precision=` rounds coordinates.
+    """
+
+    serializer_class = MapOverlaySerializer
+    cache_models = [MapOverlay]
+    # The map loads every overlay of the viewport at once
+    pagination_class = None
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = MapOverlay.objects.filter(is_active=True)
+
+        bbox = params.get("bbox")
+        if bbox:
+            queryset = queryset.filter(
+                geometry__bboverlaps=bbox_polygon(parse_bbox(bbox))
+            )
+
+        zoom = params.get("zoom")
+        zoom = parse_zoom(zoom) if zoom not in (None, "") else None
+        return with_display_geometry(queryset, zoom)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["precision"] = parse_precision(
+            self.request.query_params.get("precision")
+        )
+        return context
+
+
+# ==========================================
+# LIVE UPDATES
+# ==========================================
+
+
+class LocationEventsView(View):
+    """
+    Server-sent events stream of the tenant's location changes, relayed
+    from Redis pub/sub (see events.py). Needs an ASGI server: one open
+    stream would otherwise hold a sync worker for its whole lifetime.
+    """
+
+    async def get(self, request):
+        # 204 tells EventSource to stop; any other refusal makes it retry
+        user = await request.auser()
+        user_key = (request.tenant.schema_name, user.pk)
+        if (
+            not user.is_authenticated
+            or not get_redis_url()
+            or not isinstance(request, ASGIRequest)
+            or not relay.can_open(user_key)
+        ):
+            return HttpResponse(status=204)
+
+        response = StreamingHttpResponse(
+            stream_events(request.tenant.schema_name, user_key),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # Disable proxy buffering (nginx) so events are delivered at once
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+# ==========================================
+# VECTOR TILES
+# ==========================================
+
+
+class LocationTileView(APIView):
+    """Active locations as a Mapbox Vector Tile (layer "locations")."""
+
+    renderer_classes = [MVTRenderer]
+    # A viewport loads dozens of tiles per pan or zoom
+    throttle_classes = [TenantTileRateThrottle]
+
+    def get(self, request, z, x, y):
+        if not is_valid_tile(z, x, y):
+            raise Http404
+
+        location_type = request.query_params.get("location_type") or None
+        if location_type is not None and not location_type.isdigit():
+            raise ParseError("Invalid location_type.")
+
+        etag, tile = get_or_create_tile(
+            "mvt",
+            z,
+            x,
+            y,
+            lambda: render_location_tile(z, x, y, location_type),
+            variant=location_type,
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return with_etag(Response(tile), etag)
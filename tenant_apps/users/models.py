@@ -7,6 +7,7 @@ import string
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -123,6 +124,10 @@ class CustomUser(AbstractUser):
         verbose_name = _("user")
         verbose_name_plural = _("users")
         ordering = ["-date_joined"]
+        indexes = [
+            # Keyset pagination of the user list
+            models.Index(fields=["-date_joined", "-id"], name="users_date_joined_id_idx"),
+        ]
 
     def __str__(self):
         return self.get_full_name() or self.username
@@ -510,10 +515,26 @@ class UserActivity(TimeStampedModel):
         verbose_name = _("user activity")
         verbose_name_plural = _("user activities")
         ordering = ["-created_at"]
+        indexes = [
+            # Append-only log: created_at follows physical order
+            BrinIndex(fields=["created_at"], name="users_activity_created_brin"),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.get_activity_type_display()} - {self.created_at}"
 
+    @classmethod
+    def log(cls, user, activity_type, request=None, description="", **metadata):
+        """Record an activity, taking IP address and user agent from the request."""
+        return cls.objects.create(
+            user=user,
+            activity_type=activity_type,
+            description=description,
+            ip_address=request.META.get("REMOTE_ADDR") if request else None,
+            user_agent=request.META.get("HTTP_USER_AGENT", "") if request else "",
+            metadata=metadata,
+        )
+
 
 # ==========================================
 # USER INVITATION
@@ -0,0 +1,33 @@
+# tenant_apps/users/permissions.py
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import BasePermission
+
+
+class RolePermission(BasePermission):
+    """Allows superusers and users whose role has `role_permission`."""
+
+    role_permission = None
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        if user.is_superuser:
+            return True
+        profile = getattr(user, "profile", None)
+        return bool(profile and profile.has_permission(self.role_permission))
+
+
+class CanExportData(RolePermission):
+    """Allows superusers and users whose role has `can_export_data`."""
+
+    role_permission = "can_export_data"
+    message = _("Your role does not allow data exports.")
+
+
+class CanManageContent(RolePermission):
+    """Allows superusers and users whose role has `can_manage_content`."""
+
+    role_permission = "can_manage_content"
+    message = _("Your role does not allow changing content.")
@@ -1,7 +1,7 @@
 # tenant_apps/users/urls.py
 
 from django.contrib.auth.views import LogoutView
-from django.urls import path
+from django.urls import path, re_path
 
 from . import views
 
@@ -15,4 +15,9 @@ urlpatterns = [
     path("profile/edit/", views.profile_edit, name="profile_edit"),
     path("dashboard/", views.DashboardView.as_view(), name="dashboard"),
     path("", views.UserListView.as_view(), name="user_list"),
+    re_path(
+        r"^export\.(?P<export_format>csv|ndjson)$",
+        views.UserExportView.as_view(),
+        name="user_export",
+    ),
 ]
@@ -5,12 +5,23 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.views import LoginView
 from django.contrib import messages
+from django.db.models import F
 from django.shortcuts import render, redirect
 from django.utils.translation import gettext_lazy as _
 from django.views.generic import TemplateView, ListView
+from rest_framework.views import APIView
+
+from core.export import (
+    csv_chunks,
+    export_response,
+    get_export_chunk_size,
+    json_lines_chunks,
+)
+from core.pagination import KeysetPaginationMixin
 
 from .forms import UserProfileForm
-from .models import CustomUser, UserProfile
+from .models import CustomUser, UserActivity, UserProfile
+from .permissions import CanExportData
 
 
 # ==========================================
@@ -88,14 +99,16 @@ class StaffRequiredMixin(UserPassesTestMixin):
         return self.request.user.is_staff
 
 
-class UserListView(LoginRequiredMixin, StaffRequiredMixin, ListView):
-    """List all users. Requires staff access."""
+class UserListView(
+    LoginRequiredMixin, StaffRequiredMixin, KeysetPaginationMixin, ListView
+):
+    """List all users. Requires staff access. Paginated by keyset cursor."""
 
     model = CustomUser
     template_name = "tenants/users/user_list.html"
     context_object_name = "users"
     paginate_by = 25
-    ordering = ["-date_joined"]
+    keyset_ordering = ("-date_joined", "-id")
 
 
 # ==========================================
@@ -148,3 +161,61 @@ def user_registration(request):
         return redirect("users:dashboard")
 
     return render(request, "tenants/users/register.html")
+
+
+# ==========================================
+# EXPORT
+# ==========================================
+
+USER_EXPORT_FIELDS = [
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_staff",
+    "date_joined",
+    "last_login",
+    "phone",
+    "department",
+    "job_title",
+]
+PROFILE_EXPORT_FIELDS = {
+    "role": "profile__role__name",
+    "language": "profile__language",
+    "timezone": "profile__timezone",
+}
+
+
+class UserExportView(APIView):
+    """
+    Streams users with their profile as CSV or NDJSON from a server-side
+    cursor. Requires a role with `can_export_data`; each export is logged.
+    """
+
+    permission_classes = [CanExportData]
+
+    def get(self, request, export_format):
+        rows = (
+            CustomUser.objects.order_by("id")
+            .values(
+                *USER_EXPORT_FIELDS,
+                **{name: F(path) for name, path in PROFILE_EXPORT_FIELDS.items()},
+            )
+            .iterator(chunk_size=get_export_chunk_size())
+        )
+        if export_format == "csv":
+            chunks = csv_chunks(rows, [*USER_EXPORT_FIELDS, *PROFILE_EXPORT_FIELDS])
+        else:
+            chunks = json_lines_chunks(rows)
+
+        UserActivity.log(
+            request.user,
+            "data_export",
+            request,
+            description="Users export",
+            model="users.customuser",
+            format=export_format,
+        )
+        return export_response(request, chunks, export_format, "users")